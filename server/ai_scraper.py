@@ -2,31 +2,32 @@ import os
 import sqlite3
 import time
 import shutil
-import httpx
 from datetime import datetime
-from dotenv import load_dotenv
-from openai import OpenAI
-from apscheduler.schedulers.background import BackgroundScheduler
-
-# Load environment variables
-load_dotenv()
+from clients import load_env
+from metrics import incr
+from run_coordinator import run_scheduled
+from run_traces import count, record_phase, traced_run
+from scrape_cache import ScrapeGuard
+from search_index import ensure_search_index
+from summaries import summarize_trend
+from trend_names import NameIndex, canonical_key
 
 # Constants
 db_path = os.path.join(os.path.dirname(__file__), "trends.db")
 history_db_path = os.path.join(os.path.dirname(__file__), "trend_history.db")
-openai_api_key = os.getenv("OPENAI_API_KEY")
-
-# Initialize OpenAI client
-client = OpenAI(api_key=openai_api_key)
 
-TIKTOK_SUGGEST_API = "https://www.tiktok.com/api/search/general/full/"
+BOT_NAME = "ai_scraper"
+TIKTOK_URL = os.getenv("MYSTIC_TIKTOK_URL", "https://www.tiktok.com")
+TIKTOK_SUGGEST_API = os.getenv("MYSTIC_SUGGEST_API", f"{TIKTOK_URL}/api/search/general/full/")
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/115.0.0.0 Safari/537.36",
-    "Referer": "https://www.tiktok.com/",
+    "Referer": f"{TIKTOK_URL}/",
 }
 
 TREND_SEEDS = ["trending", "viral", "challenge", "meme", "fashion", "music"]
+# Suggestions move quickly, so a good response is only reused by reruns shortly after
+SUGGEST_CACHE_TTL = int(os.getenv("MYSTIC_SUGGEST_CACHE_TTL", "900"))
 
 
 def ensure_db_schema(cursor):
@@ -47,6 +48,7 @@ def ensure_db_schema(cursor):
             leaderboard_rank INTEGER
         )
     """)
+    ensure_search_index(cursor)
 
 
 def ensure_history_schema():
@@ -70,58 +72,59 @@ def ensure_history_schema():
 
 
 def scrape_tiktok_trends():
+    import httpx
+
     print("\U0001F4E1 GPT Agent: Scraping TikTok Search Suggestions")
     trends = []
+    seen = set()
+    scrape_started = time.perf_counter()
 
+    guard = ScrapeGuard(BOT_NAME)
     for seed in TREND_SEEDS:
-        try:
-            resp = httpx.get(
-                TIKTOK_SUGGEST_API,
-                params={"keyword": seed, "from_page": "search", "region": "US"},
-                headers=HEADERS,
-                timeout=10
-            )
-            suggestions = resp.json().get("data", {}).get("suggests", [])
-            for s in suggestions:
-                tag = s.get("keyword")
-                if tag and tag.startswith("#"):
-                    trend_name = tag[1:]
-                    trends.append({
-                        "name": trend_name,
-                        "url": f"https://www.tiktok.com/tag/{trend_name}",
-                        "views": s.get("extra", {}).get("view_count", ""),
-                        "snippet": s.get("desc", ""),
-                        "likes": "",
-                        "comments": "",
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "leaderboard_rank": None
-                    })
-        except Exception as e:
-            print(f"⚠️ Error fetching suggestions for '{seed}': {e}")
-
+        # Seeds that keep failing back off, and a throttled API host is skipped for the rest of the run
+        suggestions = guard.fetch(
+            f"suggest:{seed}", lambda: fetch_suggestions(httpx, seed),
+            url=TIKTOK_SUGGEST_API, ttl=SUGGEST_CACHE_TTL, kind="suggest_api"
+        )
+        if suggestions is None:
+            continue
+        count("cards_found", len(suggestions))
+        for s in suggestions:
+            tag = s.get("keyword")
+            if tag and tag.startswith("#") and canonical_key(tag) not in seen:
+                seen.add(canonical_key(tag))
+                trend_name = tag[1:]
+                trends.append({
+                    "name": trend_name,
+                    "url": f"{TIKTOK_URL}/tag/{trend_name}",
+                    "views": s.get("extra", {}).get("view_count", ""),
+                    "snippet": s.get("desc", ""),
+                    "likes": "",
+                    "comments": "",
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "leaderboard_rank": None
+                })
+                count("cards_parsed")
+    guard.close()
+
+    record_phase(BOT_NAME, "scrape", time.perf_counter() - scrape_started)
     print(f"✅ Fetched {len(trends)} suggested trends")
     return trends
 
 
-def generate_summary_and_examples(trend_name, snippet):
-    prompt = (
-        f"You're a sharp, slightly elitist trend-savvy cultural critic with Gen Z wit and NYC edge. "
-        f"TikTok's #{trend_name} is trending. Here's a sample of the content: {snippet}\n\n"
-        "Give me a short, smart summary of the trend in 2-3 sentences—make it human, sarcastic (but not cheesy), and insightful. "
-        "Skip suggestions. Don't be a cheerleader. You’re not trying to be cool—you just are. Assume the reader knows TikTok but isn’t drinking the Kool-Aid. Avoid disclaimers about being an AI."
+def fetch_suggestions(httpx, seed):
+    resp = httpx.get(
+        TIKTOK_SUGGEST_API,
+        params={"keyword": seed, "from_page": "search", "region": "US"},
+        headers=HEADERS,
+        timeout=10
     )
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a cultural trend analyst who thinks like a NYC creative director and talks like a laid-back LA it-girl. You decode viral trends with ease, always clocking what’s legit vs. cringe."},
-                {"role": "user", "content": prompt},
-            ]
-        )
-        return response.choices[0].message.content.strip(), []
-    except Exception as e:
-        print(f"⚠️ OpenAI API error: {e}")
-        return "Summary unavailable.", []
+    resp.raise_for_status()
+    return resp.json().get("data", {}).get("suggests", [])
+
+
+def generate_summary_and_examples(trend_name, snippet, stage=None):
+    return summarize_trend(BOT_NAME, trend_name, snippet, stage)
 
 
 def score_trend(trend_name):
@@ -138,13 +141,19 @@ def determine_stage(score):
     return "Niche"
 
 
-def save_trends_to_db(trends, cursor, conn):
+def save_trends_to_db(trends, cursor, conn, names=None):
+    save_started = time.perf_counter()
+    summarize_seconds = 0.0
+    written = 0
     ensure_db_schema(cursor)
     history_conn = sqlite3.connect(history_db_path)
     history_cursor = history_conn.cursor()
     ensure_history_schema()
+    if names is None:
+        names = NameIndex(cursor)
 
     for trend in trends:
+        trend["name"] = names.resolve(trend["name"])
         score = score_trend(trend["name"])
         stage = determine_stage(score)
 
@@ -155,8 +164,12 @@ def save_trends_to_db(trends, cursor, conn):
         if summary_already_generated:
             summary, examples = existing[0], []
             print(f"⏭️ Already summarized: {trend['name']}")
+            count("skipped")
         else:
-            summary, examples = generate_summary_and_examples(trend["name"], trend.get("snippet", ""))
+            summarize_started = time.perf_counter()
+            summary, examples = generate_summary_and_examples(trend["name"], trend.get("snippet", ""), stage)
+            summarize_seconds += time.perf_counter() - summarize_started
+            count("summarized" if summary != "Summary unavailable." else "failed")
 
         trend_data = {
             "name": trend["name"],
@@ -193,6 +206,7 @@ def save_trends_to_db(trends, cursor, conn):
             print(f"✅ Saved trend: {trend['name']}")
         except sqlite3.OperationalError as e:
             print(f"❌ DB Error for trend '{trend['name']}': {e}")
+            incr("mystic_errors_total", bot=BOT_NAME, kind="sqlite")
 
         history_cursor.execute("""
             INSERT INTO trend_history (name, timestamp, score, stage, views, likes, comments, leaderboard_rank)
@@ -202,30 +216,39 @@ def save_trends_to_db(trends, cursor, conn):
             trend.get("views"), trend.get("likes"),
             trend.get("comments"), trend.get("leaderboard_rank")
         ))
+        written += 1
 
     conn.commit()
     history_conn.commit()
     history_conn.close()
 
+    incr("mystic_trends_written_total", written, bot=BOT_NAME)
+    record_phase(BOT_NAME, "summarize", summarize_seconds)
+    record_phase(BOT_NAME, "db", time.perf_counter() - save_started - summarize_seconds)
+    return written
+
 
 def run_bot():
+    with traced_run(BOT_NAME) as trace:
+        trace.status = run_once()
+
+
+def run_once():
     trends = scrape_tiktok_trends()
     if not trends:
         print("⚠️ No trends found. Exiting.")
-        return
+        return "empty"
 
     print("💾 Saving to local database...")
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    save_trends_to_db(trends, cursor, conn)
+    ensure_db_schema(cursor)
+    save_trends_to_db(trends, cursor, conn, names=NameIndex(cursor))
     conn.close()
     print("✅ All done!")
+    return "changed"
 
 
 if __name__ == "__main__":
-    run_bot()
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(run_bot, 'interval', minutes=30)
-    print("🔁 Scheduler started. Scraping every 30 minutes.")
-    scheduler.start()
-
+    load_env()
+    run_scheduled(BOT_NAME, run_bot, minutes=30)
@@ -1,8 +1,47 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import json
+import os
 import sqlite3
+from typing import List
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from change_detection import MAX_SQL_VARIABLES
+from metrics import render_prometheus
+from search_index import ensure_search_index, search_trends
+from similar_trends import fetch_similar, resolve_name
+from trend_export import SOURCES, load_pyarrow, parse_mark, stream_arrow, stream_ndjson
+from trend_movers import fetch_movers
+
+# Optional speedups: orjson for serialization, brotli-asgi for compression
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+db_path = os.path.join(os.path.dirname(__file__), "trends.db")
+
+# Responses smaller than this go out uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("MYSTIC_COMPRESSION_MIN_SIZE", "1024"))
 
-app = FastAPI()
+
+def dump_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        return dump_json(content)
+
+
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # CORS so your frontend can access it
 app.add_middleware(
@@ -12,30 +51,158 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli when the client accepts it (falls back to gzip), plain gzip otherwise
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# Serialized /trends body, reused until the DB file changes
+_trends_cache = {"key": None, "body": None}
+
+
+def db_cache_key(path):
+    # The bots write through the main file and, in WAL mode, the -wal file
+    key = []
+    for p in (path, f"{path}-wal"):
+        try:
+            st = os.stat(p)
+            key.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            key.append(None)
+    return tuple(key)
+
+
 # Fetch data from the local SQLite DB
 def fetch_trends_from_db():
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, score, stage, summary, url FROM trends")
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [
+        {
+            "name": row[0],
+            "score": row[1],
+            "stage": row[2],
+            "summary": row[3],
+            "url": row[4],
+        }
+        for row in rows
+    ]
+
+
+def fetch_trends_body():
+    key = db_cache_key(db_path)
+    if _trends_cache["body"] is None or _trends_cache["key"] != key:
+        try:
+            body = dump_json(fetch_trends_from_db())
+        except Exception as e:
+            # A locked or missing DB is served as empty but never cached, so the next request retries
+            print("DB fetch error:", e)
+            return dump_json([])
+        _trends_cache["body"] = body
+        _trends_cache["key"] = key
+    return _trends_cache["body"]
+
+
+@app.get("/trends")
+def get_trends():
+    return Response(content=fetch_trends_body(), media_type="application/json")
+
+
+_search_ready = False
+
+
+@app.get("/trends/search")
+def search(q: str = Query(..., min_length=1), limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
+    global _search_ready
     try:
-        conn = sqlite3.connect("trends.db")
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
-        cursor.execute("SELECT name, score, stage, summary, url FROM trends")
-        rows = cursor.fetchall()
+        if not _search_ready:
+            ensure_search_index(cursor)
+            conn.commit()
+            _search_ready = True
+        results = search_trends(cursor, q, limit=limit, offset=offset)
         conn.close()
+        return results
+    except Exception as e:
+        print("DB search error:", e)
+        return []
+
 
-        return [
-            {
-                "name": row[0],
-                "score": row[1],
-                "stage": row[2],
-                "summary": row[3],
-                "url": row[4],
-            }
-            for row in rows
-        ]
+@app.get("/trends/movers")
+def get_movers(
+    span: str = Query("run", pattern="^(run|24h|7d)$"),
+    kind: str = Query("climbers", pattern="^(climbers|fallers|new|dropped)$"),
+    region: str = Query(None),
+    period: str = Query(None),
+    industry: str = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+):
+    # Precomputed after each ingest; leave region/period/industry empty for the default board
+    try:
+        conn = sqlite3.connect(db_path)
+        movers = fetch_movers(conn.cursor(), span, kind, (region, period, industry), limit)
+        conn.close()
+        return movers
     except Exception as e:
-        print("DB fetch error:", e)
+        print("DB movers error:", e)
         return []
 
-@app.get("/trends")
-def get_trends():
-    return fetch_trends_from_db()
 
+@app.get("/trends/{name}/similar")
+def get_similar(name: str, limit: int = Query(10, ge=1, le=50)):
+    # Neighbours are precomputed by `mystic similar`; aliases resolve to their canonical trend
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        canonical = resolve_name(cursor, name)
+        similar = fetch_similar(cursor, canonical, limit) if canonical else None
+        conn.close()
+    except Exception as e:
+        print("DB similar error:", e)
+        return []
+    if similar is None:
+        raise HTTPException(status_code=404, detail=f"Unknown trend: {name}")
+    return similar
+
+
+@app.get("/export/{source}")
+def export_rows(
+    source: str,
+    format: str = Query("ndjson", pattern="^(ndjson|arrow)$"),
+    since: str = Query(None),
+    until: str = Query(None),
+    name: List[str] = Query(None),
+    after: str = Query(None, description="resume after this id (history) or timestamp (trends)"),
+):
+    if source not in SOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown export source: {source}")
+    if format == "arrow" and not load_pyarrow():
+        raise HTTPException(status_code=501, detail="Arrow export needs pyarrow on the server")
+    try:
+        after = parse_mark(source, after)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="after must be an integer id for history")
+
+    if name and len(name) > MAX_SQL_VARIABLES:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_SQL_VARIABLES} names per export")
+
+    # The DB and table are checked here; batches are read and serialized as the client consumes them
+    try:
+        if format == "arrow":
+            chunks = stream_arrow(source, since, until, name, after)
+        else:
+            chunks = stream_ndjson(source, since, until, name, after)
+    except (ValueError, sqlite3.OperationalError) as e:
+        raise HTTPException(status_code=404, detail=f"No {source} data to export: {e}")
+    media_type = "application/vnd.apache.arrow.stream" if format == "arrow" else "application/x-ndjson"
+    return StreamingResponse(chunks, media_type=media_type)
+
+
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,417 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import botv2
+import change_detection
+import clients
+import metrics
+import trend_export
+import trend_movers
+from run_traces import percentile
+from search_index import ensure_search_index
+from trend_names import NameIndex
+
+# Reproducible benchmarks for the storage and API hot paths. Data is synthetic
+# (fixed seed), the scraper and OpenAI are local fakes, and every run writes a
+# JSON result tagged with the git commit so two commits can be compared.
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DATA_DIR = os.getenv("MYSTIC_BENCH_DATA_DIR", os.path.join(SERVER_DIR, "bench_data"))
+BENCH_RESULTS_DIR = os.getenv("MYSTIC_BENCH_RESULTS_DIR", os.path.join(SERVER_DIR, "bench_results"))
+SIZES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+SEED = 1337
+HISTORY_ROWS_PER_TREND = 10
+INGEST_BATCH = 100
+
+WORDS = [
+    "siren", "eyes", "glow", "core", "coquette", "bow", "clean", "girl", "mob", "wife",
+    "tomato", "summer", "latte", "makeup", "quiet", "luxury", "cowboy", "boots", "mermaid", "dance",
+    "remix", "challenge", "grwm", "haul", "dupe", "skincare", "routine", "office", "y2k", "vintage",
+    "thrift", "matcha", "pilates", "cottage", "dark", "academia", "blokette", "gorpcore", "espresso", "martini",
+]
+
+
+def trend_name(i):
+    n = len(WORDS)
+    return f"{WORDS[i % n]} {WORDS[(i // n) % n]} {i}"
+
+
+def snippet_for(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(12))
+
+
+class FakeCompletions:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def create(self, model, messages, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="A synthetic summary for benchmarking."))],
+            usage=SimpleNamespace(prompt_tokens=120, completion_tokens=40)
+        )
+
+
+class FakeOpenAI:
+    def __init__(self, latency=0.0):
+        self.chat = SimpleNamespace(completions=FakeCompletions(latency))
+
+
+def fake_scrape(rng, start, count, views_bump=0):
+    # Same shape as botv2.scrape_tiktok_creative_center output
+    now = datetime.utcnow().isoformat()
+    return [{
+        "name": trend_name(start + i),
+        "url": f"https://ads.tiktok.com/business/creativecenter/hashtag/{start + i}",
+        "views": f"{rng.randint(1, 999) + views_bump}K",
+        "snippet": "",
+        "likes": "",
+        "comments": "",
+        "timestamp": now,
+        "leaderboard_rank": i + 1,
+    } for i in range(count)]
+
+
+def dataset_dir(size):
+    return os.path.join(BENCH_DATA_DIR, size)
+
+
+def point_modules_at(directory):
+    trends_db = os.path.join(directory, "trends.db")
+    history_db = os.path.join(directory, "trend_history.db")
+    botv2.db_path = trends_db
+    botv2.history_db_path = history_db
+    trend_export.SOURCES["trends"]["path"] = trends_db
+    trend_export.SOURCES["history"]["path"] = history_db
+    trend_export.db_path = trends_db
+    trend_movers.db_path = trends_db
+    trend_movers.history_db_path = history_db
+    metrics.metrics_db_path = os.path.join(directory, "metrics.db")
+    return trends_db, history_db
+
+
+def generate(size, force=False):
+    directory = dataset_dir(size)
+    if os.path.exists(os.path.join(directory, "READY")) and not force:
+        # Datasets from older commits pick up new history columns and indexes
+        point_modules_at(directory)
+        botv2.ensure_history_schema()
+        return directory
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    trends_db, history_db = point_modules_at(directory)
+    rows = SIZES[size]
+    names = max(1, rows // HISTORY_ROWS_PER_TREND)
+    rng = random.Random(SEED)
+    started = time.perf_counter()
+    print(f"🧪 Generating {size} dataset: {rows:,} trends, {rows:,} history rows over {names:,} names...")
+
+    conn = sqlite3.connect(trends_db)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA synchronous = OFF")
+    botv2.ensure_db_schema(cursor)
+    # The FTS triggers would fire per row; rebuild the index once at the end instead
+    for trigger in ["trends_fts_ai", "trends_fts_ad", "trends_fts_au"]:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    base = datetime(2025, 1, 1)
+    cursor.executemany("""
+        INSERT INTO trends (name, summary, score, stage, examples, url, snippet, views, likes, comments, timestamp, leaderboard_rank)
+        VALUES (?, ?, ?, ?, '[]', ?, ?, ?, '', '', ?, ?)
+    """, (
+        (trend_name(i), f"Summary of {trend_name(i)}: {snippet_for(rng)}", score, botv2.determine_stage(score),
+         f"https://example.com/{i}", snippet_for(rng), f"{rng.randint(1, 999)}K",
+         (base + timedelta(seconds=i)).isoformat(), i % 100 + 1)
+        for i in range(rows) for score in [rng.randint(0, 99)]
+    ))
+    cursor.execute("DROP TABLE IF EXISTS trends_fts")
+    ensure_search_index(cursor)
+    conn.commit()
+    conn.close()
+
+    botv2.ensure_history_schema()
+    conn = sqlite3.connect(history_db)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA synchronous = OFF")
+    cursor.executemany("""
+        INSERT INTO trend_history (name, timestamp, score, stage, views, likes, comments, leaderboard_rank)
+        VALUES (?, ?, ?, ?, ?, '', '', ?)
+    """, (
+        (trend_name(j % names), (base + timedelta(seconds=30 * j)).isoformat(), score,
+         botv2.determine_stage(score), f"{rng.randint(1, 999)}K", rng.randint(1, 100))
+        for j in range(rows) for score in [rng.randint(0, 99)]
+    ))
+    conn.commit()
+    conn.close()
+
+    open(os.path.join(directory, "READY"), "w").close()
+    print(f"✅ Generated {size} dataset in {time.perf_counter() - started:.1f}s → {directory}")
+    return directory
+
+
+def measure(fn, repeat, warmup=1):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(warmup):
+            fn()
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - started)
+    return {
+        "median_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "min_ms": min(samples) * 1000,
+        "runs": repeat,
+    }
+
+
+def ingest_benchmarks(directory, repeat, llm_latency):
+    # Ingest mutates the DB, so it runs on a scratch copy of the dataset
+    scratch = os.path.join(directory, "scratch")
+    shutil.rmtree(scratch, ignore_errors=True)
+    os.makedirs(scratch)
+    for name in ["trends.db", "trend_history.db"]:
+        shutil.copy(os.path.join(directory, name), scratch)
+    trends_db, _ = point_modules_at(scratch)
+    clients._openai_client = FakeOpenAI(llm_latency)
+
+    rng = random.Random(SEED)
+    conn = sqlite3.connect(trends_db)
+    cursor = conn.cursor()
+    # One index per benchmark, like one per bot run; loading it is not what's being measured
+    names = NameIndex(cursor)
+    fresh = {"next": 10 * SIZES["10m"]}
+
+    def ingest_new():
+        batch = fake_scrape(rng, fresh["next"], INGEST_BATCH)
+        fresh["next"] += INGEST_BATCH
+        botv2.save_trends_to_db(batch, cursor, conn, names=names)
+
+    moved = fake_scrape(rng, 0, INGEST_BATCH)
+
+    def ingest_moved():
+        for trend in moved:
+            trend["views"] = f"{rng.randint(1, 10**6)}K"
+        botv2.save_trends_to_db([dict(trend) for trend in moved], cursor, conn, names=names)
+
+    def ingest_unchanged():
+        botv2.save_trends_to_db([dict(trend) for trend in moved], cursor, conn, names=names)
+
+    results = {
+        f"ingest.new_{INGEST_BATCH}": measure(ingest_new, repeat),
+        f"ingest.moved_{INGEST_BATCH}": measure(ingest_moved, repeat),
+        f"ingest.unchanged_{INGEST_BATCH}": measure(ingest_unchanged, repeat),
+    }
+    conn.close()
+    clients._openai_client = None
+    point_modules_at(directory)
+    shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+def api_benchmarks(directory, repeat):
+    try:
+        import api_server
+    except ImportError as e:
+        print(f"⚠️ Skipping API benchmarks: {e}")
+        return {}
+
+    trends_db, history_db = point_modules_at(directory)
+    api_server.db_path = trends_db
+    rows = sqlite3.connect(trends_db).execute("SELECT MAX(id) FROM trends").fetchone()[0] or 0
+    last = sqlite3.connect(history_db).execute("SELECT MAX(timestamp) FROM trend_history").fetchone()[0]
+    trend_movers.refresh_movers(datetime.fromisoformat(last))
+    probe = trend_name(rows // 2)
+
+    def trends_cold():
+        api_server._trends_cache["body"] = None
+        api_server.get_trends()
+
+    def consume(stream):
+        for _ in stream:
+            pass
+
+    results = {
+        "api.trends_cold": measure(trends_cold, max(1, repeat // 4)),
+        "api.trends_cached": measure(api_server.get_trends, repeat),
+        "api.search_term": measure(lambda: api_server.search("glow", 20, 0), repeat),
+        "api.search_prefix": measure(lambda: api_server.search("coq", 20, 0), repeat),
+        "api.search_phrase": measure(lambda: api_server.search("siren eyes", 20, 0), repeat),
+        "api.search_deep_page": measure(lambda: api_server.search("core", 20, 1000), repeat),
+        "api.search_miss": measure(lambda: api_server.search("zzzz", 20, 0), repeat),
+        "api.export_trend_by_name": measure(lambda: consume(trend_export.stream_ndjson("trends", names=[probe])), repeat),
+        "api.movers_24h": measure(lambda: api_server.get_movers("24h", "climbers", None, None, None, 20), repeat),
+    }
+    return results
+
+
+def history_benchmarks(directory, repeat):
+    _, history_db = point_modules_at(directory)
+    conn = sqlite3.connect(history_db)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(DISTINCT name), MIN(timestamp), MAX(timestamp) FROM trend_history")
+    names, first, last = cursor.fetchone()
+    rng = random.Random(SEED)
+    sample = [trend_name(rng.randrange(max(1, names))) for _ in range(INGEST_BATCH)]
+    window_start = datetime.fromisoformat(last) - timedelta(hours=1)
+
+    def consume(stream):
+        for _ in stream:
+            pass
+
+    results = {
+        f"history.last_values_{INGEST_BATCH}": measure(
+            lambda: change_detection.last_history_values(cursor, sample), repeat),
+        "history.one_name_series": measure(lambda: cursor.execute(
+            "SELECT timestamp, views, leaderboard_rank FROM trend_history WHERE name = ? ORDER BY id", (sample[0],)
+        ).fetchall(), repeat),
+        "history.last_hour_window": measure(lambda: cursor.execute(
+            "SELECT name, leaderboard_rank, views FROM trend_history WHERE timestamp >= ? ORDER BY timestamp",
+            (window_start.isoformat(),)
+        ).fetchall(), repeat),
+        "history.export_last_hour": measure(
+            lambda: consume(trend_export.stream_ndjson("history", since=window_start.isoformat())), repeat),
+        "history.refresh_movers": measure(
+            lambda: trend_movers.refresh_movers(datetime.fromisoformat(last)), max(1, repeat // 4)),
+    }
+    conn.close()
+    return results
+
+
+def scoring_benchmarks(repeat):
+    names = [trend_name(i) for i in range(100_000)]
+
+    def score_all():
+        for name in names:
+            botv2.determine_stage(botv2.score_trend(name))
+
+    return {"scoring.score_and_stage_100k": measure(score_all, repeat)}
+
+
+SUITES = ["ingest", "api", "history", "scoring"]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(size="1k", suites=None, repeat=20, llm_latency=0.0, out=None):
+    suites = suites or SUITES
+    directory = generate(size)
+    started = time.perf_counter()
+    results = {}
+    for suite in suites:
+        print(f"⏱️ Running {suite} benchmarks on the {size} dataset...")
+        if suite == "ingest":
+            results.update(ingest_benchmarks(directory, repeat, llm_latency))
+        elif suite == "api":
+            results.update(api_benchmarks(directory, repeat))
+        elif suite == "history":
+            results.update(history_benchmarks(directory, repeat))
+        elif suite == "scoring":
+            results.update(scoring_benchmarks(max(1, repeat // 4)))
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.utcnow().isoformat(),
+        "size": size,
+        "rows": SIZES[size],
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "llm_latency_ms": llm_latency * 1000,
+        "duration_seconds": time.perf_counter() - started,
+        "results": results,
+    }
+    if out is None:
+        os.makedirs(BENCH_RESULTS_DIR, exist_ok=True)
+        out = os.path.join(BENCH_RESULTS_DIR, f"{size}-{commit or 'nocommit'}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'benchmark':<36} {'median':>10} {'p95':>10}")
+    for name, result in results.items():
+        print(f"{name:<36} {result['median_ms']:>8.2f}ms {result['p95_ms']:>8.2f}ms")
+    print(f"\n📄 Results written to {out}")
+    return report
+
+
+def compare(base_path, new_path, threshold=0.10):
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    if base["size"] != new["size"]:
+        print(f"⚠️ Comparing different dataset sizes: {base['size']} vs {new['size']}")
+
+    print(f"{'benchmark':<36} {base['commit'] or 'base':>10} {new['commit'] or 'new':>10} {'change':>8}")
+    regressions = 0
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        before = base["results"].get(name, {}).get("median_ms")
+        after = new["results"].get(name, {}).get("median_ms")
+        if before is None or after is None:
+            print(f"{name:<36} {'—' if before is None else f'{before:.2f}ms':>10} {'—' if after is None else f'{after:.2f}ms':>10}")
+            continue
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  ⚠️ slower"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  🚀 faster"
+        print(f"{name:<36} {before:>8.2f}ms {after:>8.2f}ms {change:>+7.0%}{flag}")
+    return regressions
+
+
+def add_arguments(parser):
+    sub = parser.add_subparsers(dest="bench_command", required=True)
+
+    generate_parser = sub.add_parser("generate", help="build a synthetic dataset")
+    generate_parser.add_argument("--size", choices=list(SIZES), default="1k")
+    generate_parser.add_argument("--force", action="store_true", help="rebuild even if it exists")
+
+    run_parser = sub.add_parser("run", help="run the benchmark suites and write a JSON result")
+    run_parser.add_argument("--size", choices=list(SIZES), default="1k")
+    run_parser.add_argument("--suite", action="append", choices=SUITES, dest="suites",
+                            help="only these suites (repeatable)")
+    run_parser.add_argument("--repeat", type=int, default=20)
+    run_parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="delay per fake OpenAI call")
+    run_parser.add_argument("--out")
+
+    compare_parser = sub.add_parser("compare", help="compare two result files by median")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="flag changes larger than this fraction")
+    compare_parser.add_argument("--fail-on-regression", action="store_true")
+
+
+def main(args):
+    if args.bench_command == "generate":
+        generate(args.size, args.force)
+    elif args.bench_command == "run":
+        run(args.size, args.suites, args.repeat, args.llm_latency_ms / 1000, args.out)
+    elif args.bench_command == "compare":
+        regressions = compare(args.base, args.new, args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mystic benchmarks")
+    add_arguments(parser)
+    main(parser.parse_args())
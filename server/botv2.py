@@ -2,27 +2,41 @@ import os
 import sqlite3
 import time
 import shutil
+from contextlib import contextmanager
 from datetime import datetime
-from dotenv import load_dotenv
-from openai import OpenAI
-from playwright.sync_api import sync_playwright, TimeoutError
-from apscheduler.schedulers.background import BackgroundScheduler
-
-# Load environment variables
-load_dotenv()
+from urllib.parse import urlsplit
+from change_detection import fingerprint, last_fingerprint, last_history_values, leaderboard_fingerprint, record_fingerprint, record_heartbeat
+from clients import load_env
+from metrics import incr, observe
+from run_coordinator import renew_lease, run_scheduled
+from run_traces import count, record_phase, traced_run
+from scrape_cache import ScrapeGuard, raise_for_status
+from search_index import ensure_search_index
+from summaries import summarize_trend
+from trend_movers import new_run_id, record_dropouts, refresh_movers
+from trend_names import NameIndex
 
 # Constants
 db_path = os.path.join(os.path.dirname(__file__), "trends.db")
 history_db_path = os.path.join(os.path.dirname(__file__), "trend_history.db")
-openai_api_key = os.getenv("OPENAI_API_KEY")
-
-# Initialize OpenAI client
-client = OpenAI(api_key=openai_api_key)
 
-BASE_URL = "https://ads.tiktok.com/business/creativecenter/inspiration/popular/hashtag/pc/en"
-BRAVE_EXECUTABLE_PATH = "/Applications/Brave Browser.app/Contents/MacOS/Brave Browser"
+BOT_NAME = "botv2"
+# Base URLs and browser are overridable so the bot can run against fixture_server.py
+BASE_URL = os.getenv("MYSTIC_CREATIVE_CENTER_URL", "https://ads.tiktok.com/business/creativecenter/inspiration/popular/hashtag/pc/en")
+ORIGIN = "{0.scheme}://{0.netloc}".format(urlsplit(BASE_URL))
+CARD_SELECTOR = "a.CardPc_container___oNb0"
+BOARD_KEY = "name, COALESCE(region, ''), COALESCE(period, ''), COALESCE(industry, '')"
+BRAVE_EXECUTABLE_PATH = os.getenv("MYSTIC_BROWSER_PATH", "/Applications/Brave Browser.app/Contents/MacOS/Brave Browser")
+HEADLESS = os.getenv("MYSTIC_HEADLESS") == "1"
 USER_DATA_DIR = "/tmp/mystic_brave_profile"
 
+# Streaming mode: flush every STREAM_BATCH_SIZE cards instead of holding the whole board
+STREAM_BATCH_SIZE = int(os.getenv("MYSTIC_STREAM_BATCH_SIZE", "25"))
+STREAM_MAX_CARDS = int(os.getenv("MYSTIC_STREAM_MAX_CARDS", "5000"))
+STREAM_MAX_SCROLLS = int(os.getenv("MYSTIC_STREAM_MAX_SCROLLS", "3000"))
+STREAM_IDLE_SCROLLS = 8
+STREAM_MODE = os.getenv("MYSTIC_STREAM") == "1"
+
 def clear_browser_cache(user_data_dir):
     cache_path = os.path.join(user_data_dir, "Default", "Cache")
     code_cache_path = os.path.join(user_data_dir, "Default", "Code Cache")
@@ -61,6 +75,24 @@ def ensure_db_schema(cursor):
             cursor.execute(f"ALTER TABLE trends ADD COLUMN {column} {col_type}")
         except sqlite3.OperationalError:
             pass
+    ensure_boards_schema(cursor)
+    ensure_search_index(cursor)
+
+def ensure_boards_schema(cursor):
+    # trends has one row per name; each leaderboard's own rank and views live here
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS trend_boards (
+            name TEXT,
+            region TEXT,
+            period TEXT,
+            industry TEXT,
+            views TEXT,
+            leaderboard_rank INTEGER,
+            timestamp TEXT
+        )
+    """)
+    # UNIQUE treats NULLs as distinct, so the default board's all-NULL key is coalesced
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_trend_boards_board ON trend_boards({BOARD_KEY})")
 
 def ensure_history_schema():
     conn = sqlite3.connect(history_db_path)
@@ -75,18 +107,34 @@ def ensure_history_schema():
             views TEXT,
             likes TEXT,
             comments TEXT,
-            leaderboard_rank INTEGER
+            leaderboard_rank INTEGER,
+            region TEXT,
+            period TEXT,
+            industry TEXT,
+            run_id TEXT
         )
     """)
+    for column in ["region", "period", "industry", "run_id"]:
+        try:
+            cursor.execute(f"ALTER TABLE trend_history ADD COLUMN {column} TEXT")
+        except sqlite3.OperationalError:
+            pass
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trend_history_name ON trend_history(name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trend_history_region ON trend_history(region, period)")
+    # Recent rows and per-board series, for the trend_movers refresh
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trend_history_timestamp ON trend_history(timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trend_history_board ON trend_history(region, period, industry, name, timestamp)")
     conn.commit()
     conn.close()
 
 def scroll_until_loaded(page, target_count=100, max_scrolls=60, delay=1.05):
+    from playwright.sync_api import TimeoutError
+
     for i in range(max_scrolls):
         page.mouse.wheel(0, 350)
         time.sleep(delay)
         try:
-            card_count = page.locator("a.CardPc_container___oNb0").count()
+            card_count = page.locator(CARD_SELECTOR).count()
             print(f"🌀 Scroll {i+1}/{max_scrolls} — Cards found: {card_count}")
             if card_count >= target_count:
                 print("✅ Required number of trend cards loaded.")
@@ -95,81 +143,162 @@ def scroll_until_loaded(page, target_count=100, max_scrolls=60, delay=1.05):
             print("⚠️ Timeout when counting cards. Retrying.")
             continue
 
-def scrape_tiktok_creative_center():
-    print(f"🌐 Scraping TikTok Creative Center... (persistent login, fresh cache)")
-    trends = []
-    try:
-        clear_browser_cache(USER_DATA_DIR)
-        with sync_playwright() as p:
-            context = p.chromium.launch_persistent_context(
-                user_data_dir=USER_DATA_DIR,
-                headless=False,
-                executable_path=BRAVE_EXECUTABLE_PATH,
-                args=["--disable-blink-features=AutomationControlled", "--start-maximized"]
-            )
-            page = context.new_page()
+@contextmanager
+def creative_center_page(url=BASE_URL, user_data_dir=USER_DATA_DIR):
+    from playwright.sync_api import sync_playwright
+
+    clear_browser_cache(user_data_dir)
+    with sync_playwright() as p:
+        context = p.chromium.launch_persistent_context(
+            user_data_dir=user_data_dir,
+            headless=HEADLESS,
+            executable_path=BRAVE_EXECUTABLE_PATH or None,
+            args=["--disable-blink-features=AutomationControlled", "--start-maximized"]
+        )
+        page = context.new_page()
+        try:
             print("🌍 Navigating to TikTok Creative Center...")
-            page.goto(BASE_URL, timeout=60000)
+            raise_for_status(page.goto(url, timeout=60000))
             page.reload()
             page.wait_for_timeout(3000)
+            yield page
+        finally:
+            page.close()
+            context.close()
+
+def parse_card(card):
+    card_started = time.perf_counter()
+    try:
+        title = card.locator(".CardPc_titleText__RYOWo").inner_text(timeout=3000).strip().replace("#", "")
+        views = card.locator(".CardPc_itemValue__XGDmG").nth(0).inner_text(timeout=3000).strip()
+        url = card.get_attribute("href")
+        full_url = f"{ORIGIN}{url}" if url else ""
+        rank = card.locator(".RankingStatus_rankingIndex__ZMDrH").inner_text(timeout=3000).strip()
 
+        print(f"🔍 #{rank}: {title} — {views}")
+        incr("mystic_cards_total", bot=BOT_NAME, outcome="parsed")
+        count("cards_parsed")
+        return {
+            "name": title,
+            "url": full_url,
+            "views": views,
+            "snippet": "",
+            "likes": "",
+            "comments": "",
+            "timestamp": datetime.utcnow().isoformat(),
+            "leaderboard_rank": int(rank) if rank.isdigit() else None
+        }
+    except Exception as e:
+        print(f"⚠️ Error parsing trend card: {e}")
+        incr("mystic_cards_total", bot=BOT_NAME, outcome="failed")
+        count("failed")
+        incr("mystic_errors_total", bot=BOT_NAME, kind="card_parse")
+        return None
+    finally:
+        observe("mystic_card_seconds", time.perf_counter() - card_started, bot=BOT_NAME)
+
+def scrape_tiktok_creative_center(previous_fingerprint=None, url=BASE_URL, user_data_dir=USER_DATA_DIR):
+    print(f"🌐 Scraping TikTok Creative Center... (persistent login, fresh cache)")
+    trends = []
+    dom_fingerprint = None
+    scrape_started = time.perf_counter()
+    try:
+        with creative_center_page(url, user_data_dir) as page:
             print("🔄 Scrolling to load all trends...")
             scroll_until_loaded(page)
 
-            cards = page.locator("a.CardPc_container___oNb0").all()
+            # One round-trip for every card's text; if it matches last run, skip per-card parsing
+            dom_fingerprint = fingerprint(page.locator(CARD_SELECTOR).all_inner_texts())
+            record_phase(BOT_NAME, "scrape", time.perf_counter() - scrape_started)
+            if previous_fingerprint and dom_fingerprint == previous_fingerprint:
+                print("💤 Leaderboard DOM unchanged since last run.")
+                return None, dom_fingerprint
+
+            cards = page.locator(CARD_SELECTOR).all()
             print(f"🔍 Found {len(cards)} trend cards.")
+            count("cards_found", len(cards))
+            parse_started = time.perf_counter()
 
-            for idx, card in enumerate(cards):
-                try:
-                    title = card.locator(".CardPc_titleText__RYOWo").inner_text(timeout=3000).strip().replace("#", "")
-                    views = card.locator(".CardPc_itemValue__XGDmG").nth(0).inner_text(timeout=3000).strip()
-                    url = card.get_attribute("href")
-                    full_url = f"https://ads.tiktok.com{url}" if url else ""
-                    rank = card.locator(".RankingStatus_rankingIndex__ZMDrH").inner_text(timeout=3000).strip()
-
-                    print(f"🔍 #{rank}: {title} — {views}")
-
-                    trends.append({
-                        "name": title,
-                        "url": full_url,
-                        "views": views,
-                        "snippet": "",
-                        "likes": "",
-                        "comments": "",
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "leaderboard_rank": int(rank) if rank.isdigit() else None
-                    })
-                except Exception as e:
-                    print(f"⚠️ Error parsing trend card: {e}")
+            for card in cards:
+                trend = parse_card(card)
+                if trend:
+                    trends.append(trend)
 
-            page.close()
-            context.close()
+            record_phase(BOT_NAME, "parse", time.perf_counter() - parse_started)
 
     except Exception as e:
         print(f"❌ Browser scraping error: {e}")
+        incr("mystic_errors_total", bot=BOT_NAME, kind="browser")
 
     print(f"✅ Scraped {len(trends)} trend(s).")
-    return trends
-
-def generate_summary_and_examples(trend_name, snippet):
-    prompt = (
-        f"You're a sharp, slightly elitist trend-savvy cultural critic with Gen Z wit and NYC edge. "
-        f"TikTok's #{trend_name} is trending. Here's a sample of the content: {snippet}\n\n"
-        "Give me a short, smart summary of the trend in 2-3 sentences—make it human, sarcastic (but not cheesy), and insightful. "
-        "Skip suggestions. Don't be a cheerleader. You’re not trying to be cool—you just are. Assume the reader knows TikTok but isn’t drinking the Kool-Aid. Avoid disclaimers about being an AI."
-    )
+    return trends, dom_fingerprint
+
+def iter_card_batches(page, batch_size, max_cards, max_scrolls=STREAM_MAX_SCROLLS, delay=1.05):
+    from playwright.sync_api import TimeoutError
+
+    # Only an index into the card list is tracked; cards already handed out are never revisited
+    cards = page.locator(CARD_SELECTOR)
+    processed = 0
+    idle_scrolls = 0
+    scrolls = 0
+    batch = []
+    while scrolls < max_scrolls:
+        try:
+            available = min(cards.count(), max_cards)
+        except TimeoutError:
+            print("⚠️ Timeout when counting cards. Retrying.")
+            available = processed
+
+        idle_scrolls = 0 if available > processed else idle_scrolls + 1
+        while processed < available:
+            batch.append(cards.nth(processed))
+            processed += 1
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if processed >= max_cards or idle_scrolls >= STREAM_IDLE_SCROLLS:
+            break
+        page.mouse.wheel(0, 350)
+        time.sleep(delay)
+        scrolls += 1
+
+    if batch:
+        yield batch
+    print(f"🌀 Streamed {processed} card(s) in {scrolls} scroll(s).")
+
+def stream_tiktok_creative_center(on_batch, batch_size=STREAM_BATCH_SIZE, max_cards=STREAM_MAX_CARDS):
+    print(f"🌐 Streaming TikTok Creative Center... (batches of {batch_size}, up to {max_cards} cards)")
+    total = 0
+    started = time.perf_counter()
+    parse_seconds = 0.0
+    flush_seconds = 0.0
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a cultural trend analyst who thinks like a NYC creative director and talks like a laid-back LA it-girl. You decode viral trends with ease, always clocking what’s legit vs. cringe."},
-                {"role": "user", "content": prompt},
-            ]
-        )
-        return response.choices[0].message.content.strip(), []
+        with creative_center_page() as page:
+            for batch in iter_card_batches(page, batch_size, max_cards):
+                count("cards_found", len(batch))
+                parse_started = time.perf_counter()
+                trends = [trend for trend in map(parse_card, batch) if trend]
+                parse_seconds += time.perf_counter() - parse_started
+
+                if trends:
+                    flush_started = time.perf_counter()
+                    on_batch(trends)
+                    flush_seconds += time.perf_counter() - flush_started
+                    total += len(trends)
+                    print(f"📦 Flushed batch of {len(trends)} — {total} trend(s) saved so far.")
+
     except Exception as e:
-        print(f"⚠️ OpenAI API error: {e}")
-        return "Summary unavailable.", []
+        print(f"❌ Browser scraping error: {e}")
+        incr("mystic_errors_total", bot=BOT_NAME, kind="browser")
+
+    record_phase(BOT_NAME, "parse", parse_seconds)
+    record_phase(BOT_NAME, "scrape", time.perf_counter() - started - parse_seconds - flush_seconds)
+    print(f"✅ Streamed {total} trend(s).")
+    return total
+
+def generate_summary_and_examples(trend_name, snippet, stage=None):
+    return summarize_trend(BOT_NAME, trend_name, snippet, stage)
 
 def score_trend(trend_name):
     return len(trend_name) * 7 % 100
@@ -183,13 +312,43 @@ def determine_stage(score):
         return "Early"
     return "Niche"
 
-def save_trends_to_db(trends, cursor, conn):
+def shard_dimensions(shard):
+    shard = shard or {}
+    return shard.get("region"), shard.get("period"), shard.get("industry")
+
+def save_board_stats(cursor, trend, dimensions):
+    cursor.execute(f"""
+        INSERT INTO trend_boards (name, region, period, industry, views, leaderboard_rank, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT({BOARD_KEY}) DO UPDATE SET
+            views=excluded.views,
+            leaderboard_rank=excluded.leaderboard_rank,
+            timestamp=excluded.timestamp
+    """, (trend["name"], *dimensions, trend.get("views"), trend.get("leaderboard_rank"), trend.get("timestamp")))
+
+def save_trends_to_db(trends, cursor, conn, names=None, shard=None, run_id=None):
+    save_started = time.perf_counter()
+    run_id = run_id or new_run_id()
+    summarize_seconds = 0.0
     ensure_db_schema(cursor)
     history_conn = sqlite3.connect(history_db_path)
     history_cursor = history_conn.cursor()
     ensure_history_schema()
+    if names is None:
+        names = NameIndex(cursor)
 
+    region, period, industry = dimensions = shard_dimensions(shard)
     for trend in trends:
+        trend["name"] = names.resolve(trend["name"])
+    previous = last_history_values(history_cursor, [trend["name"] for trend in trends], dimensions)
+    written = 0
+
+    for trend in trends:
+        if previous.get(trend["name"]) == (trend.get("leaderboard_rank"), trend.get("views")):
+            print(f"⏩ Unchanged on leaderboard: {trend['name']}")
+            count("skipped")
+            continue
+
         score = score_trend(trend["name"])
         stage = determine_stage(score)
 
@@ -198,9 +357,20 @@ def save_trends_to_db(trends, cursor, conn):
         is_unchanged = existing and existing[0] == trend.get("snippet")
 
         if is_unchanged:
-            print(f"⏩ Skipping unchanged trend: {trend['name']}")
+            # Same content, new position: refresh the numbers without another summary
+            if shard:
+                cursor.execute("UPDATE trends SET timestamp = ? WHERE name = ?", (trend.get("timestamp"), trend["name"]))
+            else:
+                cursor.execute("""
+                    UPDATE trends SET views = ?, leaderboard_rank = ?, timestamp = ?
+                    WHERE name = ?
+                """, (trend.get("views"), trend.get("leaderboard_rank"), trend.get("timestamp"), trend["name"]))
+            print(f"🔁 Updated leaderboard stats: {trend['name']}")
         else:
-            summary, examples = generate_summary_and_examples(trend["name"], trend.get("snippet", ""))
+            summarize_started = time.perf_counter()
+            summary, examples = generate_summary_and_examples(trend["name"], trend.get("snippet", ""), stage)
+            summarize_seconds += time.perf_counter() - summarize_started
+            count("summarized" if summary != "Summary unavailable." else "failed")
             trend_data = {
                 "name": trend["name"],
                 "summary": summary,
@@ -215,58 +385,142 @@ def save_trends_to_db(trends, cursor, conn):
                 "timestamp": trend.get("timestamp"),
                 "leaderboard_rank": trend.get("leaderboard_rank")
             }
+            # Shards finish in any order, so their per-board numbers only go to trend_boards
+            board_columns = [] if shard else ["views", "leaderboard_rank"]
+            if shard:
+                trend_data.update(views=None, leaderboard_rank=None)
+            updates = ",\n                        ".join(
+                f"{column}=excluded.{column}"
+                for column in ["summary", "score", "stage", "examples", "url", "snippet", "likes", "comments", "timestamp"] + board_columns
+            )
 
             try:
-                cursor.execute("""
+                cursor.execute(f"""
                     INSERT INTO trends (name, summary, score, stage, examples, url, snippet, views, likes, comments, timestamp, leaderboard_rank)
                     VALUES (:name, :summary, :score, :stage, :examples, :url, :snippet, :views, :likes, :comments, :timestamp, :leaderboard_rank)
                     ON CONFLICT(name) DO UPDATE SET
-                        summary=excluded.summary,
-                        score=excluded.score,
-                        stage=excluded.stage,
-                        examples=excluded.examples,
-                        url=excluded.url,
-                        snippet=excluded.snippet,
-                        views=excluded.views,
-                        likes=excluded.likes,
-                        comments=excluded.comments,
-                        timestamp=excluded.timestamp,
-                        leaderboard_rank=excluded.leaderboard_rank
+                        {updates}
                 """, trend_data)
                 print(f"✅ Saved trend: {trend['name']}")
             except sqlite3.OperationalError as e:
                 print(f"❌ DB Error for trend '{trend['name']}': {e}")
+                incr("mystic_errors_total", bot=BOT_NAME, kind="sqlite")
 
+        save_board_stats(cursor, trend, dimensions)
         history_cursor.execute("""
-            INSERT INTO trend_history (name, timestamp, score, stage, views, likes, comments, leaderboard_rank)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO trend_history (name, timestamp, score, stage, views, likes, comments, leaderboard_rank, region, period, industry, run_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             trend["name"], trend["timestamp"], score, stage,
             trend.get("views"), trend.get("likes"),
-            trend.get("comments"), trend.get("leaderboard_rank")
+            trend.get("comments"), trend.get("leaderboard_rank"),
+            region, period, industry, run_id
         ))
+        written += 1
 
     conn.commit()
     history_conn.commit()
     history_conn.close()
 
-def run_bot():
-    trends = scrape_tiktok_creative_center()
-    if not trends:
-        print("⚠️ No trends found. Exiting.")
-        return
+    incr("mystic_trends_written_total", written, bot=BOT_NAME)
+    record_phase(BOT_NAME, "summarize", summarize_seconds)
+    record_phase(BOT_NAME, "db", time.perf_counter() - save_started - summarize_seconds)
+    return written
 
-    print("💾 Saving to local database...")
+def save_dropouts(board_names, shard, run_id):
+    history_conn = sqlite3.connect(history_db_path)
+    record_dropouts(history_conn.cursor(), board_names, shard_dimensions(shard), run_id)
+    history_conn.commit()
+    history_conn.close()
+
+def save_scrape(cursor, conn, source, trends, dom_fingerprint, names=None, shard=None):
+    # Shared by the single-board run and the sharded writer; source keys the fingerprints
+    if trends is None:
+        record_heartbeat(cursor, source, "unchanged", 0)
+        conn.commit()
+        print(f"💤 {source}: nothing changed. Heartbeat recorded.")
+        return "unchanged", 0
+
+    board_fingerprint = leaderboard_fingerprint(trends)
+    if board_fingerprint == last_fingerprint(cursor, source):
+        record_fingerprint(cursor, f"{source}:dom", dom_fingerprint, len(trends))
+        record_heartbeat(cursor, source, "unchanged", len(trends))
+        conn.commit()
+        print(f"💤 {source}: leaderboard unchanged since last run. Heartbeat recorded.")
+        return "unchanged", 0
+
+    print(f"💾 Saving {source} to local database...")
+    run_id = new_run_id()
+    written = save_trends_to_db(trends, cursor, conn, names=names, shard=shard, run_id=run_id)
+    save_dropouts([trend["name"] for trend in trends], shard, run_id)
+    record_fingerprint(cursor, f"{source}:dom", dom_fingerprint, len(trends))
+    record_fingerprint(cursor, source, board_fingerprint, len(trends))
+    record_heartbeat(cursor, source, "changed", written)
+    conn.commit()
+    return "changed", written
+
+def record_board_outcome(guard, url, trends):
+    # An empty board means the page failed or was blocked; None means it loaded but hadn't changed
+    if trends == []:
+        guard.failed(url, error="no trend cards loaded")
+    else:
+        guard.succeeded(url)
+
+def run_streaming(cursor, conn, guard):
+    # Each batch is committed as it arrives, so a crash keeps everything flushed so far
+    ensure_db_schema(cursor)
+    names = NameIndex(cursor)
+    run_id = new_run_id()
+    board_names = []
+    written = 0
+
+    def flush_batch(batch):
+        nonlocal written
+        written += save_trends_to_db(batch, cursor, conn, names=names, run_id=run_id)
+        board_names.extend(trend["name"] for trend in batch)
+        # Streams of thousands of cards can outlast the lease TTL
+        renew_lease()
+
+    total = stream_tiktok_creative_center(flush_batch)
+    record_board_outcome(guard, BASE_URL, [] if not total else None)
+    if total:
+        save_dropouts(board_names, None, run_id)
+        refresh_movers()
+    record_heartbeat(cursor, BOT_NAME, "streamed", written)
+    conn.commit()
+    conn.close()
+    print(f"✅ All done! {written}/{total} trend(s) changed.")
+    return "streamed" if total else "empty"
+
+def run_once(stream=False):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    save_trends_to_db(trends, cursor, conn)
+    guard = ScrapeGuard(BOT_NAME, conn)
+    if not guard.allow(BASE_URL):
+        conn.close()
+        print("⏳ Creative Center is backing off after recent failures. Skipping this run.")
+        return "backoff"
+    if stream:
+        return run_streaming(cursor, conn, guard)
+
+    trends, dom_fingerprint = scrape_tiktok_creative_center(last_fingerprint(cursor, f"{BOT_NAME}:dom"))
+    record_board_outcome(guard, BASE_URL, trends)
+    if trends == []:
+        conn.close()
+        print("⚠️ No trends found. Exiting.")
+        return "empty"
+
+    status, written = save_scrape(cursor, conn, BOT_NAME, trends, dom_fingerprint)
     conn.close()
-    print("✅ All done!")
+    if status == "changed":
+        refresh_movers()
+        print(f"✅ All done! {written}/{len(trends)} trend(s) changed.")
+    return status
 
-if __name__ == "__main__":
-    run_bot()
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(run_bot, 'interval', minutes=30)
-    print("🔁 Scheduler started. Scraping every 30 minutes.")
-    scheduler.start()
+def run_bot(stream=STREAM_MODE):
+    with traced_run(BOT_NAME) as trace:
+        trace.status = run_once(stream)
 
+if __name__ == "__main__":
+    load_env()
+    run_scheduled(BOT_NAME, run_bot, minutes=30)
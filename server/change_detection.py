@@ -0,0 +1,78 @@
+import hashlib
+import json
+from datetime import datetime
+
+# SQLite's default limit on bound parameters per statement
+MAX_SQL_VARIABLES = 900
+
+
+def fingerprint(items):
+    payload = json.dumps(items, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def leaderboard_fingerprint(trends):
+    return fingerprint([(t["name"], t.get("leaderboard_rank"), t.get("views")) for t in trends])
+
+
+def ensure_fingerprint_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_fingerprints (
+            source TEXT PRIMARY KEY,
+            fingerprint TEXT,
+            item_count INTEGER,
+            updated_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS run_heartbeats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT,
+            timestamp TEXT,
+            status TEXT,
+            item_count INTEGER
+        )
+    """)
+
+
+def last_fingerprint(cursor, source):
+    ensure_fingerprint_schema(cursor)
+    cursor.execute("SELECT fingerprint FROM scrape_fingerprints WHERE source = ?", (source,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def record_fingerprint(cursor, source, value, item_count):
+    ensure_fingerprint_schema(cursor)
+    cursor.execute("""
+        INSERT OR REPLACE INTO scrape_fingerprints (source, fingerprint, item_count, updated_at)
+        VALUES (?, ?, ?, ?)
+    """, (source, value, item_count, datetime.utcnow().isoformat()))
+
+
+def record_heartbeat(cursor, source, status, item_count):
+    ensure_fingerprint_schema(cursor)
+    cursor.execute("""
+        INSERT INTO run_heartbeats (source, timestamp, status, item_count)
+        VALUES (?, ?, ?, ?)
+    """, (source, datetime.utcnow().isoformat(), status, item_count))
+
+
+def last_history_values(history_cursor, names, dimensions=None):
+    # Latest (leaderboard_rank, views) per name, for writing only rows that moved.
+    # dimensions=(region, period, industry) restricts the lookup to one leaderboard shard.
+    latest = {}
+    names = list(set(names))
+    shard_filter = " AND region IS ? AND period IS ? AND industry IS ?" if dimensions else ""
+    for i in range(0, len(names), MAX_SQL_VARIABLES):
+        chunk = names[i:i + MAX_SQL_VARIABLES]
+        placeholders = ",".join("?" * len(chunk))
+        history_cursor.execute(f"""
+            SELECT name, leaderboard_rank, views FROM trend_history
+            WHERE id IN (
+                SELECT MAX(id) FROM trend_history WHERE name IN ({placeholders}){shard_filter} GROUP BY name
+            )
+        """, chunk + list(dimensions or []))
+        for name, rank, views in history_cursor.fetchall():
+            latest[name] = (rank, views)
+    return latest
@@ -0,0 +1,24 @@
+import os
+
+# The OpenAI SDK takes a noticeable share of start-up time, so the client is
+# only built the first time something actually needs a summary.
+_openai_client = None
+
+
+def load_env():
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def get_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        from openai import OpenAI
+
+        load_env()
+        # OPENAI_BASE_URL points the bots at fixture_server.py or another compatible endpoint
+        _openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL") or None)
+    return _openai_client
@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import shutil
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import urlencode
+import botv2
+from change_detection import last_fingerprint
+from clients import load_env
+from metrics import flush, incr
+from run_coordinator import run_scheduled
+from run_traces import count, traced_run
+from scrape_cache import ScrapeGuard, host_of
+from trend_names import NameIndex
+
+# One job per region × period × industry leaderboard. Browsers run in a pool of
+# worker processes; only the parent process writes to SQLite.
+BOT_NAME = "creative_center_shards"
+SHARD_WORKERS = int(os.getenv("MYSTIC_SHARD_WORKERS", str(os.cpu_count() or 1)))
+SHARD_RETRIES = int(os.getenv("MYSTIC_SHARD_RETRIES", "2"))
+
+_worker_profile = None
+_circuit_open = None
+
+
+def env_list(name, default):
+    return [value.strip() for value in os.getenv(name, default).split(",") if value.strip()]
+
+
+def shard_key(region, period, industry):
+    return "/".join(value for value in (region, period, industry) if value)
+
+
+def plan_shards(regions=None, periods=None, industries=None):
+    regions = regions or env_list("MYSTIC_SHARD_REGIONS", "US")
+    periods = periods or env_list("MYSTIC_SHARD_PERIODS", "7")
+    industries = industries or env_list("MYSTIC_SHARD_INDUSTRIES", "") or [None]
+
+    shards = []
+    for region in regions:
+        for period in periods:
+            for industry in industries:
+                params = {"countryCode": region, "period": period}
+                if industry:
+                    params["industry"] = industry
+                shards.append({
+                    "key": shard_key(region, period, industry),
+                    "region": region,
+                    "period": period,
+                    "industry": industry,
+                    "url": f"{botv2.BASE_URL}?{urlencode(params)}"
+                })
+    return shards
+
+
+def init_worker(slots, circuit_open):
+    # Chromium locks its profile, so each worker browses with its own copy of the logged-in one
+    global _worker_profile, _circuit_open
+    _worker_profile = f"{botv2.USER_DATA_DIR}-shard{slots.get()}"
+    _circuit_open = circuit_open
+    if os.path.exists(botv2.USER_DATA_DIR):
+        shutil.copytree(
+            botv2.USER_DATA_DIR, _worker_profile, dirs_exist_ok=True,
+            ignore=shutil.ignore_patterns("Singleton*", "Cache", "Code Cache")
+        )
+
+
+def scrape_shard(shard, previous_fingerprint):
+    # Set by the parent once the host's circuit opens; shards still queued then don't start a browser
+    if _circuit_open.is_set():
+        return None
+    try:
+        return botv2.scrape_tiktok_creative_center(previous_fingerprint, url=shard["url"], user_data_dir=_worker_profile)
+    finally:
+        # Pool workers exit without running atexit hooks
+        flush()
+
+
+def scrape_round(shards, previous, workers, guard):
+    slots = multiprocessing.Queue()
+    for slot in range(workers):
+        slots.put(slot)
+    circuit_open = multiprocessing.Event()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(slots, circuit_open)) as pool:
+        futures = {pool.submit(scrape_shard, shard, previous.get(shard["key"])): shard for shard in shards}
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Shard {shard['key']} crashed: {e}")
+                result = [], None
+            if result is None:
+                continue
+            yield shard, *result
+            # The caller has recorded this outcome by now
+            if guard.is_open(host_of(shard["url"])):
+                circuit_open.set()
+
+
+def run_sharded(shards=None, workers=SHARD_WORKERS, retries=SHARD_RETRIES):
+    shards = shards or plan_shards()
+    workers = max(1, min(workers, len(shards)))
+    print(f"🧩 Scraping {len(shards)} leaderboard shard(s) with {workers} browser worker(s)...")
+
+    conn = sqlite3.connect(botv2.db_path)
+    cursor = conn.cursor()
+    botv2.ensure_db_schema(cursor)
+    botv2.ensure_history_schema()
+    names = NameIndex(cursor)
+    sources = {shard["key"]: f"{botv2.BOT_NAME}:{shard['key']}" for shard in shards}
+    previous = {key: last_fingerprint(cursor, f"{source}:dom") for key, source in sources.items()}
+
+    statuses = {}
+    written = 0
+    # Workers only browse; backoffs and circuit breakers are checked and recorded here
+    guard = ScrapeGuard(BOT_NAME, conn)
+    pending = []
+    for shard in shards:
+        if guard.allow(shard["url"]):
+            pending.append(shard)
+        else:
+            statuses[shard["key"]] = "backoff"
+            print(f"⏳ Shard {shard['key']} held back by a backoff or an open circuit.")
+    for attempt in range(retries + 1):
+        if attempt:
+            # Retries ignore the per-board backoff but wait out an open circuit. Shards held
+            # back while a probe was out rejoin once it has closed the circuit.
+            for shard in pending:
+                if guard.is_open(host_of(shard["url"])):
+                    statuses[shard["key"]] = "backoff"
+            pending = [shard for shard in pending if shard["key"] not in statuses]
+            for shard in shards:
+                if statuses.get(shard["key"]) == "backoff" and guard.allow(shard["url"]):
+                    del statuses[shard["key"]]
+                    pending.append(shard)
+        if not pending:
+            break
+        if attempt:
+            print(f"🔁 Retrying {len(pending)} shard(s) (attempt {attempt + 1}/{retries + 1})...")
+        failed = []
+        finished = set()
+        # Results arrive as workers finish; this loop is the single writer
+        for shard, trends, dom_fingerprint in scrape_round(pending, previous, min(workers, len(pending)), guard):
+            finished.add(shard["key"])
+            botv2.record_board_outcome(guard, shard["url"], trends)
+            if trends == []:
+                incr("mystic_errors_total", bot=BOT_NAME, kind="shard")
+                failed.append(shard)
+                continue
+            if trends:
+                count("cards_parsed", len(trends))
+            try:
+                status, shard_written = botv2.save_scrape(
+                    cursor, conn, sources[shard["key"]], trends, dom_fingerprint, names=names, shard=shard
+                )
+            except sqlite3.Error as e:
+                conn.rollback()
+                print(f"❌ DB error for shard {shard['key']}: {e}")
+                incr("mystic_errors_total", bot=BOT_NAME, kind="sqlite")
+                status, shard_written = "failed", 0
+            statuses[shard["key"]] = status
+            written += shard_written
+        pending = failed + [shard for shard in pending if shard["key"] not in finished]
+
+    for shard in pending:
+        statuses[shard["key"]] = "failed"
+        print(f"❌ Shard {shard['key']} failed after {retries + 1} attempt(s).")
+    conn.close()
+    if written:
+        botv2.refresh_movers()
+
+    failures = sum(1 for status in statuses.values() if status == "failed")
+    skipped = sum(1 for status in statuses.values() if status == "backoff")
+    print(f"✅ All done! {written} trend(s) changed across {len(shards) - failures - skipped}/{len(shards)} shard(s)"
+          + (f", {skipped} skipped while backing off." if skipped else "."))
+    if all(status == "backoff" for status in statuses.values()):
+        return "backoff"
+    if failures == len(shards):
+        return "failed"
+    if failures:
+        return "partial"
+    return "changed" if "changed" in statuses.values() else "unchanged"
+
+
+def run_bot(workers=SHARD_WORKERS):
+    with traced_run(BOT_NAME) as trace:
+        trace.status = run_sharded(workers=workers)
+
+
+if __name__ == "__main__":
+    load_env()
+    run_scheduled(BOT_NAME, run_bot, minutes=60)
@@ -0,0 +1,338 @@
+import argparse
+import html
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Offline stand-ins for Creative Center, TikTok Discover/tag pages, the search
+# suggestion API and OpenAI chat completions. The markup uses the same
+# selectors the bots scrape, so the whole pipeline runs against localhost.
+DEFAULT_PORT = int(os.getenv("MYSTIC_FIXTURE_PORT", "8765"))
+CREATIVE_CENTER_PATH = "/business/creativecenter/inspiration/popular/hashtag/pc/en"
+CARDS_PER_SCROLL = 20
+WORDS = [
+    "siren", "glow", "core", "coquette", "latte", "makeup", "cowboy", "mermaid", "dance", "remix",
+    "grwm", "haul", "dupe", "skincare", "y2k", "thrift", "matcha", "pilates", "cottage", "espresso",
+]
+
+DEFAULT_CONFIG = {
+    "cards": 100,
+    "discover_tags": 60,
+    "suggestions": 12,
+    "page_latency_ms": 0,
+    "api_latency_ms": 0,
+    "llm_latency_ms": 0,
+    "jitter_ms": 0,
+    "failure_rate": 0.0,
+    "llm_429_rate": 0.0,
+    "seed": 1337,
+    "recordings": None,
+}
+
+
+class FixtureState:
+    def __init__(self, **config):
+        self.config = {**DEFAULT_CONFIG, **{k: v for k, v in config.items() if v is not None}}
+        self.rng = random.Random(self.config["seed"])
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def record(self, route, outcome):
+        with self.lock:
+            key = f"{route}:{outcome}"
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def roll(self, rate):
+        with self.lock:
+            return self.rng.random() < rate
+
+    def sleep(self, base_ms):
+        jitter = self.config["jitter_ms"]
+        with self.lock:
+            extra = self.rng.uniform(0, jitter) if jitter else 0
+        if base_ms or extra:
+            time.sleep((base_ms + extra) / 1000)
+
+
+def tag_name(seed, i):
+    rng = random.Random(f"{seed}:{i}")
+    return f"{rng.choice(WORDS)}{rng.choice(WORDS)}{i}"
+
+
+def view_count(rng):
+    value = rng.randint(1_000, 90_000_000)
+    if value >= 1_000_000:
+        return f"{value / 1_000_000:.1f}M"
+    return f"{value // 1000}K"
+
+
+def board(state, query):
+    # Each region/period/industry combination gets its own stable leaderboard
+    shard = "/".join(query.get(key, [""])[0] for key in ("countryCode", "period", "industry"))
+    seed = f"{state.config['seed']}:{shard}"
+    rng = random.Random(seed)
+    return [{
+        "name": tag_name(seed, i),
+        "views": view_count(rng),
+        "rank": i + 1,
+    } for i in range(state.config["cards"])]
+
+
+def creative_center_html(cards):
+    # Cards are appended CARDS_PER_SCROLL at a time as the page scrolls, like the real infinite list
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Creative Center fixture</title>
+<style>a.CardPc_container___oNb0 {{ display: block; height: 120px; margin: 8px; border: 1px solid #ddd; }}</style>
+</head><body>
+<div id="list"></div>
+<script>
+const cards = {json.dumps(cards)};
+let shown = 0;
+function more() {{
+  const list = document.getElementById("list");
+  for (const card of cards.slice(shown, shown + {CARDS_PER_SCROLL})) {{
+    const a = document.createElement("a");
+    a.className = "CardPc_container___oNb0";
+    a.href = "/business/creativecenter/hashtag/" + encodeURIComponent(card.name);
+    a.innerHTML = '<span class="RankingStatus_rankingIndex__ZMDrH">' + card.rank + '</span>' +
+      '<span class="CardPc_titleText__RYOWo">#' + card.name + '</span>' +
+      '<span class="CardPc_itemValue__XGDmG">' + card.views + '</span>';
+    list.appendChild(a);
+  }}
+  shown = Math.min(cards.length, shown + {CARDS_PER_SCROLL});
+}}
+more();
+window.addEventListener("wheel", more);
+window.addEventListener("scroll", more);
+</script>
+</body></html>"""
+
+
+def discover_html(state):
+    seed = f"{state.config['seed']}:discover"
+    rng = random.Random(seed)
+    # Views sit inside the link but aren't rendered, so the link text stays just the tag
+    links = "\n".join(
+        f'<a href="/tag/{name}">#{name}<div data-e2e="browse-video-views" style="display:none">{view_count(rng)}</div></a>'
+        for name in (tag_name(seed, i) for i in range(state.config["discover_tags"]))
+    )
+    return f"<!doctype html><html><head><meta charset=\"utf-8\"><title>Discover fixture</title></head><body>{links}</body></html>"
+
+
+def tag_html(name):
+    rng = random.Random(name)
+    captions = "\n".join(
+        f'<div data-e2e="browse-video-desc">{html.escape(" ".join(rng.choice(WORDS) for _ in range(10)))} #{html.escape(name)}</div>'
+        for _ in range(rng.randint(3, 6))
+    )
+    return f"""<!doctype html><html><head><meta charset="utf-8"><title>#{html.escape(name)}</title></head><body>
+{captions}
+<strong data-e2e="like-count">{view_count(rng)}</strong>
+<strong data-e2e="comment-count">{rng.randint(10, 9999)}</strong>
+</body></html>"""
+
+
+def suggestions_json(state, keyword):
+    rng = random.Random(f"{state.config['seed']}:{keyword}")
+    suggests = []
+    for i in range(state.config["suggestions"]):
+        name = f"{keyword}{rng.choice(WORDS)}{i}"
+        # Mix of hashtag and plain-keyword suggestions; the bot keeps only hashtags
+        suggests.append({
+            "keyword": f"#{name}" if i % 3 else name,
+            "desc": " ".join(rng.choice(WORDS) for _ in range(8)),
+            "extra": {"view_count": view_count(rng)},
+        })
+    return {"status_code": 0, "data": {"suggests": suggests}}
+
+
+def chat_completion(body):
+    messages = body.get("messages", [])
+    prompt = " ".join(str(m.get("content", "")) for m in messages)
+    prompt_tokens = max(1, len(prompt) // 4)
+    content = "A fixture summary: the kind of trend that is everywhere this week and gone by the next one."
+    return {
+        "id": f"chatcmpl-fixture-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fixture"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 20, "total_tokens": prompt_tokens + 20},
+    }
+
+
+def make_handler(state):
+    from http.server import BaseHTTPRequestHandler
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, status, body, content_type, headers=None):
+            payload = body if isinstance(body, bytes) else body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def send_json(self, status, payload, headers=None):
+            self.send_body(status, json.dumps(payload), "application/json", headers)
+
+        def recording(self, kind):
+            directory = state.config["recordings"]
+            path = os.path.join(directory, f"{kind}.html") if directory else None
+            if path and os.path.exists(path):
+                with open(path, "rb") as f:
+                    return f.read()
+            return None
+
+        def maybe_fail(self, route, as_json=False):
+            if not state.roll(state.config["failure_rate"]):
+                return False
+            state.record(route, "injected_failure")
+            if as_json:
+                self.send_json(503, {"error": "fixture failure"})
+            else:
+                self.send_body(503, "<html><body>Service unavailable (fixture)</body></html>", "text/html")
+            return True
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+
+            if url.path == "/__fixture/stats":
+                with state.lock:
+                    self.send_json(200, {"config": state.config, "stats": state.stats})
+                return
+
+            if url.path.startswith("/business/creativecenter"):
+                state.sleep(state.config["page_latency_ms"])
+                if self.maybe_fail("creative_center"):
+                    return
+                state.record("creative_center", "ok")
+                body = self.recording("creative_center") or creative_center_html(board(state, query))
+                self.send_body(200, body, "text/html; charset=utf-8")
+            elif url.path.rstrip("/") == "/discover":
+                state.sleep(state.config["page_latency_ms"])
+                if self.maybe_fail("discover"):
+                    return
+                state.record("discover", "ok")
+                self.send_body(200, self.recording("discover") or discover_html(state), "text/html; charset=utf-8")
+            elif url.path.startswith("/tag/"):
+                state.sleep(state.config["page_latency_ms"])
+                if self.maybe_fail("tag"):
+                    return
+                state.record("tag", "ok")
+                self.send_body(200, tag_html(unquote(url.path[len("/tag/"):])), "text/html; charset=utf-8")
+            elif url.path.rstrip("/") == "/api/search/general/full":
+                state.sleep(state.config["api_latency_ms"])
+                if self.maybe_fail("suggest_api", as_json=True):
+                    return
+                state.record("suggest_api", "ok")
+                self.send_json(200, suggestions_json(state, query.get("keyword", [""])[0]))
+            else:
+                state.record("unknown", "404")
+                self.send_body(404, "not found", "text/plain")
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b"{}"
+            try:
+                body = json.loads(raw or b"{}")
+            except json.JSONDecodeError:
+                self.send_json(400, {"error": {"message": "invalid JSON", "type": "invalid_request_error"}})
+                return
+
+            if url.path == "/__fixture/config":
+                with state.lock:
+                    state.config.update({k: v for k, v in body.items() if k in DEFAULT_CONFIG})
+                    config = dict(state.config)
+                self.send_json(200, config)
+                return
+
+            if url.path.rstrip("/") in ("/v1/chat/completions", "/chat/completions"):
+                state.sleep(state.config["llm_latency_ms"])
+                if state.roll(state.config["llm_429_rate"]):
+                    state.record("chat_completions", "429")
+                    self.send_json(429, {"error": {
+                        "message": "Rate limit reached (fixture)", "type": "rate_limit_exceeded", "code": "rate_limit_exceeded"
+                    }}, headers={"Retry-After": "1"})
+                    return
+                if self.maybe_fail("chat_completions", as_json=True):
+                    return
+                state.record("chat_completions", "ok")
+                self.send_json(200, chat_completion(body))
+                return
+
+            self.send_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+
+    return FixtureHandler
+
+
+def base_urls(host, port):
+    origin = f"http://{host}:{port}"
+    return {
+        "MYSTIC_CREATIVE_CENTER_URL": f"{origin}{CREATIVE_CENTER_PATH}",
+        "MYSTIC_TIKTOK_URL": origin,
+        "MYSTIC_SUGGEST_API": f"{origin}/api/search/general/full/",
+        "OPENAI_BASE_URL": f"{origin}/v1",
+    }
+
+
+def start_fixture_server(host="127.0.0.1", port=0, **config):
+    # port=0 picks a free port; handy for running the fixtures inside a benchmark process
+    from http.server import ThreadingHTTPServer
+
+    state = FixtureState(**config)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def add_arguments(parser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cards", type=int, help="Creative Center cards per board")
+    parser.add_argument("--discover-tags", type=int, help="tag links on the Discover page")
+    parser.add_argument("--page-latency-ms", type=float, help="delay before serving each HTML page")
+    parser.add_argument("--api-latency-ms", type=float, help="delay before each suggestion API response")
+    parser.add_argument("--llm-latency-ms", type=float, help="delay before each chat completion")
+    parser.add_argument("--jitter-ms", type=float, help="extra uniform random delay on every response")
+    parser.add_argument("--failure-rate", type=float, help="fraction of requests answered with 503")
+    parser.add_argument("--llm-429-rate", type=float, help="fraction of chat completions answered with 429")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--recordings", help="directory with creative_center.html / discover.html to serve verbatim")
+
+
+def main(args):
+    config = {key: getattr(args, key) for key in DEFAULT_CONFIG if hasattr(args, key)}
+    server = start_fixture_server(args.host, args.port, **config)
+    host, port = server.server_address[:2]
+    print(f"🧪 Fixture server on http://{host}:{port} — point the bots at it with:")
+    for key, value in base_urls(host, port).items():
+        print(f"   export {key}={value}")
+    print("   export OPENAI_API_KEY=fixture")
+    print(f"   (live stats: http://{host}:{port}/__fixture/stats, tune with POST /__fixture/config)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline TikTok and OpenAI fixtures")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,144 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Bots and the API are separate processes, so metrics are aggregated in memory
+# and added into a small SQLite file after each run; /metrics reads from there.
+metrics_db_path = os.getenv("MYSTIC_METRICS_DB", os.path.join(os.path.dirname(__file__), "metrics.db"))
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+BUCKET_LABELS = [str(b) for b in LATENCY_BUCKETS] + ["+Inf"]
+
+_lock = threading.Lock()
+_counters = {}
+_buckets = {}
+
+
+def format_labels(labels):
+    parts = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return ",".join(parts)
+
+
+def incr(name, amount=1, **labels):
+    key = (name, format_labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    label_str = format_labels(labels)
+    le = next((str(b) for b in LATENCY_BUCKETS if value <= b), "+Inf")
+    with _lock:
+        _buckets[(name, label_str, le)] = _buckets.get((name, label_str, le), 0) + 1
+        _counters[(f"{name}_sum", label_str)] = _counters.get((f"{name}_sum", label_str), 0) + value
+        _counters[(f"{name}_count", label_str)] = _counters.get((f"{name}_count", label_str), 0) + 1
+
+
+@contextmanager
+def timer(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def ensure_metrics_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS metric_counters (
+            name TEXT,
+            labels TEXT,
+            value REAL,
+            PRIMARY KEY (name, labels)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS metric_buckets (
+            name TEXT,
+            labels TEXT,
+            le TEXT,
+            count REAL,
+            PRIMARY KEY (name, labels, le)
+        )
+    """)
+
+
+def flush():
+    with _lock:
+        counters = list(_counters.items())
+        buckets = list(_buckets.items())
+        _counters.clear()
+        _buckets.clear()
+    if not counters and not buckets:
+        return
+
+    try:
+        conn = sqlite3.connect(metrics_db_path, timeout=30)
+        cursor = conn.cursor()
+        ensure_metrics_schema(cursor)
+        cursor.executemany("""
+            INSERT INTO metric_counters (name, labels, value) VALUES (?, ?, ?)
+            ON CONFLICT(name, labels) DO UPDATE SET value = value + excluded.value
+        """, [(name, labels, value) for (name, labels), value in counters])
+        cursor.executemany("""
+            INSERT INTO metric_buckets (name, labels, le, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT(name, labels, le) DO UPDATE SET count = count + excluded.count
+        """, [(name, labels, le, count) for (name, labels, le), count in buckets])
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ Metrics flush error: {e}")
+
+
+atexit.register(flush)
+
+
+def render_prometheus():
+    flush()
+    if not os.path.exists(metrics_db_path):
+        return ""
+
+    conn = sqlite3.connect(metrics_db_path, timeout=30)
+    cursor = conn.cursor()
+    ensure_metrics_schema(cursor)
+    cursor.execute("SELECT name, labels, le, count FROM metric_buckets")
+    histograms = {}
+    for name, labels, le, count in cursor.fetchall():
+        histograms.setdefault(name, {}).setdefault(labels, {})[le] = count
+    cursor.execute("SELECT name, labels, value FROM metric_counters ORDER BY name, labels")
+    counters = cursor.fetchall()
+    conn.close()
+
+    lines = []
+    histogram_parts = {}
+    last_name = None
+    for name, labels, value in counters:
+        base = name.rsplit("_", 1)[0]
+        if base in histograms:
+            histogram_parts[(name, labels)] = value
+            continue
+        if name != last_name:
+            lines.append(f"# TYPE {name} counter")
+            last_name = name
+        lines.append(f"{name}{{{labels}}} {value:g}" if labels else f"{name} {value:g}")
+
+    for name in sorted(histograms):
+        lines.append(f"# TYPE {name} histogram")
+        for labels in sorted(histograms[name]):
+            cumulative = 0
+            counts = histograms[name][labels]
+            for le in BUCKET_LABELS:
+                cumulative += counts.get(le, 0)
+                prefix = f"{labels}," if labels else ""
+                lines.append(f'{name}_bucket{{{prefix}le="{le}"}} {cumulative:g}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {histogram_parts.get((f'{name}_sum', labels), 0):g}")
+            lines.append(f"{name}_count{suffix} {histogram_parts.get((f'{name}_count', labels), 0):g}")
+
+    return "\n".join(lines) + "\n"
@@ -1,7 +1,14 @@
 import sqlite3
 import os
+from botv2 import ensure_boards_schema
+from scrape_cache import ensure_scrape_cache_schema
+from search_index import ensure_search_index
+from similar_trends import ensure_similar_schema
+from trend_movers import ensure_movers_schema
+from trend_names import dedupe_existing_trends
 
 db_path = os.path.join(os.path.dirname(__file__), "trends.db")
+history_db_path = os.path.join(os.path.dirname(__file__), "trend_history.db")
 
 def add_column_if_missing(cursor, table, column, col_type):
     cursor.execute(f"PRAGMA table_info({table})")
@@ -12,6 +19,12 @@ def add_column_if_missing(cursor, table, column, col_type):
     else:
         print(f"✅ Column already exists: {column}")
 
+def drop_column_if_present(cursor, table, column):
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column in [col[1] for col in cursor.fetchall()]:
+        print(f"➖ Dropping column: {column}")
+        cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+
 def migrate():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
@@ -20,8 +33,37 @@ def migrate():
     add_column_if_missing(cursor, "trends", "stage", "TEXT")
     add_column_if_missing(cursor, "trends", "examples", "TEXT")
     add_column_if_missing(cursor, "trends", "url", "TEXT")
+    add_column_if_missing(cursor, "trends", "snippet", "TEXT")
+    # Per-board stats moved to trend_boards; trends keeps one row per name
+    for column in ["region", "period", "industry"]:
+        drop_column_if_present(cursor, "trends", column)
+    ensure_boards_schema(cursor)
+    ensure_search_index(cursor)
+    ensure_movers_schema(cursor)
+    ensure_similar_schema(cursor)
+    ensure_scrape_cache_schema(cursor)
 
     conn.commit()
+
+    # Don't leave an empty trend_history.db behind on installs that never wrote history
+    history_conn = sqlite3.connect(history_db_path) if os.path.exists(history_db_path) else None
+    if history_conn is not None:
+        history_cursor = history_conn.cursor()
+        history_cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'trend_history'")
+        if history_cursor.fetchone():
+            for column in ["region", "period", "industry", "run_id"]:
+                add_column_if_missing(history_cursor, "trend_history", column, "TEXT")
+            history_cursor.execute("CREATE INDEX IF NOT EXISTS idx_trend_history_timestamp ON trend_history(timestamp)")
+            history_cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_trend_history_board ON trend_history(region, period, industry, name, timestamp)"
+            )
+            history_conn.commit()
+
+    print("🔗 Merging duplicate trend names...")
+    dedupe_existing_trends(conn, history_conn)
+    if history_conn is not None:
+        history_conn.close()
+
     conn.close()
     print("✅ Migration complete.")
 
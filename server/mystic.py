@@ -0,0 +1,285 @@
+import argparse
+import functools
+import importlib
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+from clients import load_env
+
+# Single entry point for the bots, the API and DB maintenance. Everything heavy
+# (Playwright, OpenAI, APScheduler, FastAPI) is imported inside the subcommand
+# that needs it, so `mystic migrate` or a cron one-shot starts in milliseconds.
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCRAPERS = {
+    "creative-center": "botv2",
+    "discover": "mystic_trend_bot",
+    "search": "ai_scraper",
+}
+
+SCRAPE_INTERVAL_MINUTES = {"botv2": 30, "ai_scraper": 30, "mystic_trend_bot": 60, "creative_center_shards": 60}
+
+# Modules that must not be pulled in just by importing a start-up path
+HEAVY_MODULES = ["playwright", "openai", "apscheduler"]
+IMPORT_BUDGETS_MS = {
+    "mystic": 150,
+    "api_server": 1500,
+    "botv2": 300,
+    "ai_scraper": 300,
+    "mystic_trend_bot": 300,
+}
+
+
+def cmd_scrape(args):
+    from run_coordinator import leased_run, run_scheduled
+
+    targets = list(SCRAPERS) if args.source == "all" else [args.source]
+    if (args.stream or args.sharded) and targets != ["creative-center"]:
+        sys.exit("--stream and --sharded are only supported for creative-center")
+    if args.stream and args.sharded:
+        sys.exit("--stream and --sharded can't be combined")
+    if args.schedule and len(targets) > 1:
+        # Each scheduler blocks, so every bot gets its own process; the DB lease keeps them apart
+        procs = [subprocess.Popen([sys.executable, __file__, "scrape", target, "--schedule"]) for target in targets]
+        for proc in procs:
+            proc.wait()
+        return
+
+    for target in targets:
+        bot = importlib.import_module("creative_center_shards" if args.sharded else SCRAPERS[target])
+        run_bot = bot.run_bot
+        if args.stream:
+            run_bot = functools.partial(bot.run_bot, stream=True)
+        elif args.sharded and args.workers:
+            run_bot = functools.partial(bot.run_bot, workers=args.workers)
+        if args.schedule:
+            run_scheduled(bot.BOT_NAME, run_bot, minutes=SCRAPE_INTERVAL_MINUTES[bot.BOT_NAME])
+        else:
+            leased_run(bot.BOT_NAME, run_bot)
+
+
+def cmd_summarize(args):
+    from summaries import describe_routing
+
+    bot = importlib.import_module(SCRAPERS[args.source])
+    conn = sqlite3.connect(os.path.join(SERVER_DIR, "trends.db"))
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, name, snippet, stage FROM trends
+        WHERE summary IS NULL OR summary = '' OR summary = 'Summary unavailable.'
+        LIMIT ?
+    """, (args.limit,))
+    rows = cursor.fetchall()
+    print(f"📝 Summarizing {len(rows)} trend(s) with {describe_routing()}...")
+
+    for trend_id, name, snippet, stage in rows:
+        summary, examples = bot.generate_summary_and_examples(name, snippet or "", stage)
+        if summary == "Summary unavailable.":
+            continue
+        cursor.execute(
+            "UPDATE trends SET summary = ?, examples = ?, timestamp = ? WHERE id = ?",
+            (summary, str(examples), datetime.utcnow().isoformat(), trend_id)
+        )
+        conn.commit()
+        print(f"✅ Summarized: {name}")
+    conn.close()
+
+
+def cmd_serve(args):
+    import uvicorn
+
+    uvicorn.run("api_server:app", host=args.host, port=args.port, reload=args.reload, app_dir=SERVER_DIR)
+
+
+def cmd_migrate(args):
+    from migrate import migrate
+
+    migrate()
+
+
+def cmd_seed(args):
+    from seed_trends import seed_database
+
+    seed_database()
+
+
+def cmd_trace(args):
+    import run_traces
+
+    run_traces.main(args)
+
+
+def cmd_bench(args):
+    import bench
+
+    bench.main(args)
+
+
+def cmd_fixtures(args):
+    import fixture_server
+
+    fixture_server.main(args)
+
+
+def cmd_export(args):
+    import trend_export
+
+    trend_export.main(args)
+
+
+def cmd_import(args):
+    import trend_import
+
+    trend_import.main(args)
+
+
+def cmd_movers(args):
+    import trend_movers
+
+    trend_movers.main(args)
+
+
+def cmd_scrape_cache(args):
+    import scrape_cache
+
+    scrape_cache.main(args)
+
+
+def cmd_similar(args):
+    import similar_trends
+
+    similar_trends.main(args)
+
+
+def measure_import(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVER_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None, [], result.stderr.strip().splitlines()[-1:]
+
+    cumulative_us = None
+    imported = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)", line)
+        if not match:
+            continue
+        imported.append(match.group(4))
+        # Nested imports are indented further; the target itself is top level
+        if match.group(4) == module and len(match.group(3)) == 1:
+            cumulative_us = int(match.group(2))
+    return cumulative_us, imported, []
+
+
+def cmd_check_imports(args):
+    failures = 0
+    for module, budget_ms in IMPORT_BUDGETS_MS.items():
+        budget_ms = args.budget_ms or budget_ms
+        cumulative_us, imported, errors = measure_import(module)
+        if errors:
+            print(f"❌ {module}: import failed — {errors[0]}")
+            failures += 1
+            continue
+
+        heavy = sorted({name.split(".")[0] for name in imported if name.split(".")[0] in HEAVY_MODULES})
+        elapsed_ms = (cumulative_us or 0) / 1000
+        ok = elapsed_ms <= budget_ms and not heavy
+        status = "✅" if ok else "❌"
+        detail = f" pulls in {', '.join(heavy)}" if heavy else ""
+        print(f"{status} {module}: {elapsed_ms:.0f} ms (budget {budget_ms} ms){detail}")
+        failures += 0 if ok else 1
+
+    if failures:
+        sys.exit(1)
+
+
+def add_tool_arguments(parser, name, module, command):
+    # Only the subcommand being run imports its module; the others never parse anything
+    if name == command:
+        importlib.import_module(module).add_arguments(parser)
+
+
+def build_parser(command=None):
+    parser = argparse.ArgumentParser(prog="mystic", description="Mystic trend bot toolbox")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scrape = sub.add_parser("scrape", help="run a scraper once, or on its schedule")
+    scrape.add_argument("source", choices=list(SCRAPERS) + ["all"])
+    scrape.add_argument("--schedule", action="store_true", help="keep running on the adaptive schedule")
+    scrape.add_argument("--stream", action="store_true",
+                        help="creative-center only: flush cards to the DB in batches while scrolling")
+    scrape.add_argument("--sharded", action="store_true",
+                        help="creative-center only: scrape every MYSTIC_SHARD_REGIONS × PERIODS × INDUSTRIES board")
+    scrape.add_argument("--workers", type=int, help="browser processes for --sharded (default: CPU count)")
+    scrape.set_defaults(func=cmd_scrape)
+
+    summarize = sub.add_parser("summarize", help="fill in missing or failed summaries")
+    summarize.add_argument("--source", choices=list(SCRAPERS), default="search",
+                           help="which bot the calls are attributed to in metrics")
+    summarize.add_argument("--limit", type=int, default=50)
+    summarize.set_defaults(func=cmd_summarize)
+
+    serve = sub.add_parser("serve", help="start the FastAPI backend")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--reload", action="store_true")
+    serve.set_defaults(func=cmd_serve)
+
+    migrate = sub.add_parser("migrate", help="bring trends.db up to the current schema")
+    migrate.set_defaults(func=cmd_migrate)
+
+    seed = sub.add_parser("seed", help="replace trends with sample data")
+    seed.set_defaults(func=cmd_seed)
+
+    trace = sub.add_parser("trace", help="run trace reports and profiling")
+    add_tool_arguments(trace, "trace", "run_traces", command)
+    trace.set_defaults(func=cmd_trace)
+
+    export = sub.add_parser("export", help="stream trends or history to Parquet, Arrow or gzip NDJSON")
+    add_tool_arguments(export, "export", "trend_export", command)
+    export.set_defaults(func=cmd_export)
+
+    backfill = sub.add_parser("import", help="bulk-load JSONL, CSV, Parquet or SQLite snapshots without LLM calls")
+    add_tool_arguments(backfill, "import", "trend_import", command)
+    backfill.set_defaults(func=cmd_import)
+
+    movers = sub.add_parser("movers", help="biggest leaderboard climbers, fallers, new entries and drop-outs")
+    add_tool_arguments(movers, "movers", "trend_movers", command)
+    movers.set_defaults(func=cmd_movers)
+
+    cache = sub.add_parser("scrape-cache", help="show or clear cached pages, backoffs and open circuits")
+    add_tool_arguments(cache, "scrape-cache", "scrape_cache", command)
+    cache.set_defaults(func=cmd_scrape_cache)
+
+    similar = sub.add_parser("similar", help="precompute each trend's nearest neighbours by name and content")
+    add_tool_arguments(similar, "similar", "similar_trends", command)
+    similar.set_defaults(func=cmd_similar)
+
+    benchmark = sub.add_parser("bench", help="synthetic-data benchmarks for ingest, API, history and scoring")
+    add_tool_arguments(benchmark, "bench", "bench", command)
+    benchmark.set_defaults(func=cmd_bench)
+
+    fixtures = sub.add_parser("fixtures", help="serve offline TikTok and OpenAI stand-ins for end-to-end runs")
+    add_tool_arguments(fixtures, "fixtures", "fixture_server", command)
+    fixtures.set_defaults(func=cmd_fixtures)
+
+    check = sub.add_parser("check-imports", help="fail if start-up paths exceed their import-time budget")
+    check.add_argument("--budget-ms", type=int, help="override every module's budget")
+    check.set_defaults(func=cmd_check_imports)
+
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser(argv[0] if argv else None).parse_args(argv)
+    load_env()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
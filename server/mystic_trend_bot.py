@@ -2,23 +2,22 @@ import os
 import sqlite3
 import time
 from datetime import datetime
-from dotenv import load_dotenv
-from openai import OpenAI
-from playwright.sync_api import sync_playwright
-from apscheduler.schedulers.blocking import BlockingScheduler
-
-# Load environment variables
-load_dotenv()
+from clients import load_env
+from metrics import incr, observe
+from run_coordinator import run_scheduled
+from run_traces import count, record_phase, traced_run
+from scrape_cache import ScrapeFailed, ScrapeGuard, raise_for_status
+from search_index import ensure_search_index
+from summaries import summarize_trend
+from trend_names import NameIndex, canonical_key
 
 # Constants
 db_path = os.path.join(os.path.dirname(__file__), "trends.db")
 history_db_path = os.path.join(os.path.dirname(__file__), "trend_history.db")
-openai_api_key = os.getenv("OPENAI_API_KEY")
-
-# Initialize OpenAI client
-client = OpenAI(api_key=openai_api_key)
 
-BASE_URL = "https://www.tiktok.com"
+BOT_NAME = "mystic_trend_bot"
+BASE_URL = os.getenv("MYSTIC_TIKTOK_URL", "https://www.tiktok.com")
+HEADLESS = os.getenv("MYSTIC_HEADLESS") == "1"
 
 
 def ensure_db_schema(cursor):
@@ -34,14 +33,16 @@ def ensure_db_schema(cursor):
             snippet TEXT,
             views TEXT,
             likes TEXT,
-            comments TEXT
+            comments TEXT,
+            timestamp TEXT
         )
     """)
-    for column in ["examples", "url", "snippet", "views", "likes", "comments"]:
+    for column in ["examples", "url", "snippet", "views", "likes", "comments", "timestamp"]:
         try:
             cursor.execute(f"ALTER TABLE trends ADD COLUMN {column} TEXT")
         except sqlite3.OperationalError:
             pass
+    ensure_search_index(cursor)
 
 
 def ensure_history_schema():
@@ -63,15 +64,27 @@ def ensure_history_schema():
     conn.close()
 
 
-def scrape_tiktok_discover(headless=False):
+def scrape_tiktok_discover(headless=HEADLESS):
     print(f"\U0001F310 Scraping TikTok Discover... (headless={headless})")
     trends = []
     seen = set()
+    scrape_started = time.perf_counter()
+    discover_url = f"{BASE_URL}/discover"
+    guard = ScrapeGuard(BOT_NAME)
+    if not guard.allow(discover_url):
+        guard.close()
+        print("⏳ TikTok Discover is backing off after recent failures. Skipping this run.")
+        return trends
+    loaded = False
     try:
+        from playwright.sync_api import sync_playwright
+
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=headless)
             page = browser.new_page()
-            page.goto(f"{BASE_URL}/discover", timeout=15000)
+            raise_for_status(page.goto(discover_url, timeout=15000))
+            guard.succeeded(discover_url)
+            loaded = True
             print("⌛ Waiting for page to load...")
             page.wait_for_timeout(5000)
 
@@ -81,15 +94,19 @@ def scrape_tiktok_discover(headless=False):
 
             items = page.query_selector_all("a[href*='/tag/']")
             print(f"🔍 Found {len(items)} tag links.")
+            count("cards_found", len(items))
+            record_phase(BOT_NAME, "scrape", time.perf_counter() - scrape_started)
+            parse_started = time.perf_counter()
 
             for item in items:
+                card_started = time.perf_counter()
                 name = item.inner_text().strip().replace("#", "")
                 href = item.get_attribute("href")
                 url = href if href.startswith("http") else f"{BASE_URL}{href}"
                 views = item.query_selector("div[data-e2e='browse-video-views']")
                 view_count = views.inner_text().strip() if views else None
-                if name and name not in seen:
-                    snippet, likes, comments = scrape_tag_snippet(browser, url)
+                if name and canonical_key(name) not in seen:
+                    snippet, likes, comments = scrape_tag_snippet(browser, url, guard)
                     trends.append({
                         "name": name,
                         "url": url,
@@ -98,24 +115,44 @@ def scrape_tiktok_discover(headless=False):
                         "likes": likes,
                         "comments": comments
                     })
-                    seen.add(name)
+                    seen.add(canonical_key(name))
+                    incr("mystic_cards_total", bot=BOT_NAME, outcome="parsed")
+                    count("cards_parsed")
+                    observe("mystic_card_seconds", time.perf_counter() - card_started, bot=BOT_NAME)
                 if len(trends) >= 50:
                     break
 
+            record_phase(BOT_NAME, "parse", time.perf_counter() - parse_started)
             browser.close()
     except Exception as e:
         print(f"❌ Browser scraping error: {e}")
+        incr("mystic_errors_total", bot=BOT_NAME, kind="browser")
+        if not loaded:
+            guard.failed(discover_url, error=e)
+    finally:
+        guard.close()
     print(f"✅ Scraped {len(trends)} trend(s).")
     return trends
 
 
-def scrape_tag_snippet(browser, url):
+def scrape_tag_snippet(browser, url, guard):
+    # Good tag pages are reused for a while; failing ones back off, and a throttled host is skipped outright
+    cached = guard.fetch(url, lambda: load_tag_page(browser, url), serve_stale=True, kind="snippet")
+    if cached is None:
+        return "No content preview available.", "", ""
+    return tuple(cached)
+
+
+def load_tag_page(browser, url):
+    tag_page = browser.new_page()
     try:
-        tag_page = browser.new_page()
-        tag_page.goto(url, timeout=15000)
+        raise_for_status(tag_page.goto(url, timeout=15000))
         tag_page.wait_for_timeout(4000)
 
         captions = tag_page.locator("div[data-e2e='browse-video-desc']").all_inner_texts()
+        # A 200 with no videos is usually a soft block or a half-rendered page, not an empty tag
+        if not captions:
+            raise ScrapeFailed(f"No captions on {url}")
         try:
             likes = tag_page.locator("strong[data-e2e='like-count']").first.inner_text(timeout=5000)
         except Exception:
@@ -126,33 +163,13 @@ def scrape_tag_snippet(browser, url):
         except Exception:
             comments = "N/A"
 
+        return [" | ".join(captions[:3]), likes, comments]
+    finally:
         tag_page.close()
-        return " | ".join(captions[:3]) if captions else "No preview", likes, comments
-    except Exception as e:
-        print(f"⚠️ Snippet scrape error: {e}")
-    return "No content preview available.", "", ""
 
 
-def generate_summary_and_examples(trend_name, snippet):
-    prompt = (
-        f"You're a sharp, slightly elitist trend-savvy cultural critic with Gen Z wit and NYC edge. "
-        f"TikTok's #{trend_name} is trending. Here's a sample of the content: {snippet}\n\n"
-        "Give me a short, smart summary of the trend in 2-3 sentences—make it human, sarcastic (but not cheesy), and insightful. "
-        "Skip suggestions. Don't be a cheerleader. You’re not trying to be cool—you just are. Assume the reader knows TikTok but isn’t drinking the Kool-Aid. Avoid disclaimers about being an AI."
-    )
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a cultural trend analyst who thinks like a NYC creative director and talks like a laid-back LA it-girl. You decode viral trends with ease, always clocking what’s legit vs. cringe."},
-                {"role": "user", "content": prompt},
-            ]
-        )
-        full_text = response.choices[0].message.content.strip()
-        return full_text, []
-    except Exception as e:
-        print(f"⚠️ OpenAI API error: {e}")
-        return "Summary unavailable.", []
+def generate_summary_and_examples(trend_name, snippet, stage=None):
+    return summarize_trend(BOT_NAME, trend_name, snippet, stage)
 
 
 def score_trend(trend_name):
@@ -170,22 +187,32 @@ def determine_stage(score):
         return "Niche"
 
 
-def save_trends_to_db(trends, cursor, conn):
+def save_trends_to_db(trends, cursor, conn, names=None):
+    save_started = time.perf_counter()
+    summarize_seconds = 0.0
+    written = 0
     ensure_db_schema(cursor)
     history_conn = sqlite3.connect(history_db_path)
     history_cursor = history_conn.cursor()
     ensure_history_schema()
+    if names is None:
+        names = NameIndex(cursor)
 
     for trend in trends:
+        trend["name"] = names.resolve(trend["name"])
         cursor.execute("SELECT snippet FROM trends WHERE name = ?", (trend["name"],))
         existing = cursor.fetchone()
         if existing and existing[0] == trend.get("snippet"):
             print(f"⏩ Skipping unchanged trend: {trend['name']}")
+            count("skipped")
             continue
 
-        summary, examples = generate_summary_and_examples(trend["name"], trend.get("snippet", ""))
         score = score_trend(trend["name"])
         stage = determine_stage(score)
+        summarize_started = time.perf_counter()
+        summary, examples = generate_summary_and_examples(trend["name"], trend.get("snippet", ""), stage)
+        summarize_seconds += time.perf_counter() - summarize_started
+        count("summarized" if summary != "Summary unavailable." else "failed")
 
         trend_data = {
             "name": trend["name"],
@@ -197,13 +224,14 @@ def save_trends_to_db(trends, cursor, conn):
             "snippet": trend.get("snippet"),
             "views": trend.get("views"),
             "likes": trend.get("likes"),
-            "comments": trend.get("comments")
+            "comments": trend.get("comments"),
+            "timestamp": datetime.utcnow().isoformat()
         }
 
         try:
             cursor.execute("""
-                INSERT INTO trends (name, summary, score, stage, examples, url, snippet, views, likes, comments)
-                VALUES (:name, :summary, :score, :stage, :examples, :url, :snippet, :views, :likes, :comments)
+                INSERT INTO trends (name, summary, score, stage, examples, url, snippet, views, likes, comments, timestamp)
+                VALUES (:name, :summary, :score, :stage, :examples, :url, :snippet, :views, :likes, :comments, :timestamp)
                 ON CONFLICT(name) DO UPDATE SET
                     summary=excluded.summary,
                     score=excluded.score,
@@ -213,7 +241,8 @@ def save_trends_to_db(trends, cursor, conn):
                     snippet=excluded.snippet,
                     views=excluded.views,
                     likes=excluded.likes,
-                    comments=excluded.comments
+                    comments=excluded.comments,
+                    timestamp=excluded.timestamp
             """, trend_data)
             print(f"✅ Saved trend: {trend['name']}")
 
@@ -221,35 +250,45 @@ def save_trends_to_db(trends, cursor, conn):
                 INSERT INTO trend_history (name, timestamp, score, stage, views, likes, comments)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (
-                trend["name"], datetime.utcnow().isoformat(), score, stage, trend.get("views"), trend.get("likes"), trend.get("comments")
+                trend["name"], trend_data["timestamp"], score, stage, trend.get("views"), trend.get("likes"), trend.get("comments")
             ))
+            written += 1
 
         except sqlite3.OperationalError as e:
             print(f"❌ DB Error for trend '{trend['name']}': {e}")
+            incr("mystic_errors_total", bot=BOT_NAME, kind="sqlite")
 
     conn.commit()
     history_conn.commit()
     history_conn.close()
 
+    incr("mystic_trends_written_total", written, bot=BOT_NAME)
+    record_phase(BOT_NAME, "summarize", summarize_seconds)
+    record_phase(BOT_NAME, "db", time.perf_counter() - save_started - summarize_seconds)
+    return written
+
 
 def run_bot():
-    trends = scrape_tiktok_discover(headless=False)
+    with traced_run(BOT_NAME) as trace:
+        trace.status = run_once()
+
+
+def run_once():
+    trends = scrape_tiktok_discover()
     if not trends:
         print("⚠️ No trends found. Exiting.")
-        return
+        return "empty"
 
     print("💾 Saving to local database...")
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    save_trends_to_db(trends, cursor, conn)
+    ensure_db_schema(cursor)
+    save_trends_to_db(trends, cursor, conn, names=NameIndex(cursor))
     conn.close()
     print("✅ All done!")
+    return "changed"
 
 
 if __name__ == "__main__":
-    run_bot()
-    scheduler = BlockingScheduler()
-    scheduler.add_job(run_bot, 'interval', hours=1)
-    print("🔁 Scheduler started. Scraping every hour.")
-    scheduler.start()
-
+    load_env()
+    run_scheduled(BOT_NAME, run_bot, minutes=60)
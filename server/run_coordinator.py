@@ -0,0 +1,225 @@
+import os
+import random
+import socket
+import sqlite3
+import time
+from datetime import datetime
+from run_traces import last_run
+
+db_path = os.path.join(os.path.dirname(__file__), "trends.db")
+history_db_path = os.path.join(os.path.dirname(__file__), "trend_history.db")
+
+# All bots write trends.db, so by default they share one lease and never overlap
+DEFAULT_LEASE = "trends-db"
+LEASE_TTL_SECONDS = int(os.getenv("MYSTIC_LEASE_TTL_MINUTES", "120")) * 60
+JITTER_SECONDS = int(os.getenv("MYSTIC_SCHEDULE_JITTER_SECONDS", "120"))
+
+# Fraction of the leaderboard that entered, left or moved between two runs
+HIGH_CHURN = 0.30
+LOW_CHURN = 0.05
+# Only these bots diff against the last history values; the others write a
+# history row for every entry on every run, so their "churn" is always 100%
+CHURN_JOBS = {"botv2", "creative_center_shards"}
+
+# Leases this process holds, so long runs can extend them
+_held_leases = {}
+
+
+def connect(path=db_path):
+    # Autocommit so BEGIN IMMEDIATE below controls the transaction
+    return sqlite3.connect(path, timeout=30, isolation_level=None)
+
+
+def ensure_coordinator_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS run_leases (
+            lease TEXT PRIMARY KEY,
+            owner TEXT,
+            acquired_at REAL,
+            expires_at REAL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS run_schedule (
+            job TEXT PRIMARY KEY,
+            interval_minutes REAL,
+            last_started REAL,
+            last_finished REAL,
+            churn REAL
+        )
+    """)
+
+
+def acquire_lease(lease, owner, ttl=LEASE_TTL_SECONDS):
+    conn = connect()
+    cursor = conn.cursor()
+    ensure_coordinator_schema(cursor)
+    now = time.time()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT owner, expires_at FROM run_leases WHERE lease = ?", (lease,))
+        row = cursor.fetchone()
+        if row and row[1] > now and row[0] != owner:
+            cursor.execute("ROLLBACK")
+            return False
+        cursor.execute(
+            "INSERT OR REPLACE INTO run_leases (lease, owner, acquired_at, expires_at) VALUES (?, ?, ?, ?)",
+            (lease, owner, now, now + ttl)
+        )
+        cursor.execute("COMMIT")
+        return True
+    finally:
+        conn.close()
+
+
+def release_lease(lease, owner):
+    conn = connect()
+    conn.execute("DELETE FROM run_leases WHERE lease = ? AND owner = ?", (lease, owner))
+    conn.close()
+
+
+def renew_lease(lease=DEFAULT_LEASE, ttl=LEASE_TTL_SECONDS):
+    # Long runs call this as they make progress; a no-op when the bot was started without a lease
+    owner = _held_leases.get(lease)
+    if owner is None:
+        return False
+    conn = connect()
+    cursor = conn.execute(
+        "UPDATE run_leases SET expires_at = ? WHERE lease = ? AND owner = ?", (time.time() + ttl, lease, owner)
+    )
+    conn.close()
+    if cursor.rowcount == 0:
+        print(f"⚠️ Lost the '{lease}' lease to another run.")
+        return False
+    return True
+
+
+def load_schedule(job):
+    conn = connect()
+    cursor = conn.cursor()
+    ensure_coordinator_schema(cursor)
+    cursor.execute("SELECT interval_minutes, last_started, last_finished, churn FROM run_schedule WHERE job = ?", (job,))
+    row = cursor.fetchone()
+    conn.close()
+    return row
+
+
+def save_schedule(job, interval_minutes, last_started, last_finished, churn):
+    conn = connect()
+    conn.execute("""
+        INSERT OR REPLACE INTO run_schedule (job, interval_minutes, last_started, last_finished, churn)
+        VALUES (?, ?, ?, ?, ?)
+    """, (job, interval_minutes, last_started, last_finished, churn))
+    conn.close()
+
+
+def iso(ts):
+    # trend_history timestamps are naive UTC isoformat strings
+    return datetime.utcfromtimestamp(ts).isoformat()
+
+
+def moved_entries(cursor, start, end):
+    # History only gets a row when a board entry moved, entered or dropped out
+    try:
+        cursor.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT DISTINCT name, region, period, industry FROM trend_history
+                WHERE timestamp >= ? AND timestamp < ?
+            )
+        """, (iso(start), iso(end)))
+    except sqlite3.OperationalError:
+        # History written before leaderboards were sharded by region and period
+        cursor.execute("""
+            SELECT COUNT(DISTINCT name) FROM trend_history
+            WHERE timestamp >= ? AND timestamp < ?
+        """, (iso(start), iso(end)))
+    return cursor.fetchone()[0]
+
+
+def measure_churn(job, started, finished):
+    # Churn comes from the run itself: entries it wrote to history over the board size it parsed
+    if job not in CHURN_JOBS:
+        return None
+    run = last_run(job, iso(started))
+    if run is None:
+        return None
+    status, board_size = run
+    if status == "unchanged":
+        return 0.0
+    if status not in ("changed", "streamed", "partial") or not board_size or not os.path.exists(history_db_path):
+        return None
+    conn = sqlite3.connect(history_db_path, timeout=30)
+    try:
+        moved = moved_entries(conn.cursor(), started, finished)
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    return min(1.0, moved / board_size)
+
+
+def next_interval(interval, churn, min_minutes, max_minutes):
+    if churn is None:
+        return interval
+    if churn >= HIGH_CHURN:
+        return max(min_minutes, interval / 2)
+    if churn <= LOW_CHURN:
+        return min(max_minutes, interval * 1.5)
+    return interval
+
+
+def leased_run(job, run_bot, lease=DEFAULT_LEASE):
+    # One-shot and scheduled runs alike only write while holding the lease
+    owner = f"{socket.gethostname()}:{os.getpid()}:{job}"
+    if not acquire_lease(lease, owner):
+        print(f"⏳ Another run holds the '{lease}' lease. Skipping {job} this cycle.")
+        return False
+    _held_leases[lease] = owner
+    try:
+        run_bot()
+    finally:
+        _held_leases.pop(lease, None)
+        release_lease(lease, owner)
+    return True
+
+
+def coordinated_run(job, run_bot, minutes, min_minutes, max_minutes, lease=DEFAULT_LEASE):
+    schedule = load_schedule(job)
+    interval = schedule[0] if schedule else minutes
+
+    started = time.time()
+    if not leased_run(job, run_bot, lease):
+        return interval
+    finished = time.time()
+
+    churn = measure_churn(job, started, finished)
+    new_interval = next_interval(interval, churn, min_minutes, max_minutes)
+    if churn is not None:
+        print(f"📊 Leaderboard churn {churn:.0%} — next {job} run in ~{new_interval:.0f} min.")
+    save_schedule(job, new_interval, started, finished, churn)
+    return new_interval
+
+
+def run_scheduled(job, run_bot, minutes, min_minutes=None, max_minutes=None, lease=DEFAULT_LEASE):
+    from apscheduler.schedulers.blocking import BlockingScheduler
+
+    min_minutes = min_minutes or max(5, minutes / 4)
+    max_minutes = max_minutes or minutes * 4
+
+    # One instance per process, missed ticks collapse into a single run
+    scheduler = BlockingScheduler(job_defaults={"max_instances": 1, "coalesce": True, "misfire_grace_time": 300})
+    current = {"interval": None}
+
+    def tick():
+        interval = coordinated_run(job, run_bot, minutes, min_minutes, max_minutes, lease=lease)
+        if current["interval"] is not None and interval != current["interval"]:
+            scheduler.reschedule_job(job, trigger="interval", minutes=interval, jitter=JITTER_SECONDS)
+        current["interval"] = interval
+        return interval
+
+    # Spread bots that boot together before the first run
+    time.sleep(random.uniform(0, min(JITTER_SECONDS, 30)))
+    interval = tick()
+    scheduler.add_job(tick, "interval", minutes=interval, jitter=JITTER_SECONDS, id=job)
+    print(f"🔁 Scheduler started. Scraping every ~{interval:.0f} minutes (adaptive).")
+    scheduler.start()
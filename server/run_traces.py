@@ -0,0 +1,247 @@
+import argparse
+import importlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from metrics import flush, incr, metrics_db_path, observe
+
+# One row per run_bot invocation, next to the aggregate metrics in metrics.db
+COUNT_FIELDS = ["cards_found", "cards_parsed", "skipped", "summarized", "failed"]
+PHASES = ["scrape", "parse", "summarize", "db"]
+
+_current = None
+
+
+class RunTrace:
+    def __init__(self, bot):
+        self.bot = bot
+        self.started_at = datetime.utcnow().isoformat()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.status = "ok"
+        self.error = None
+        self.spans = {}
+        self.counts = dict.fromkeys(COUNT_FIELDS, 0)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+def record_phase(bot, phase, seconds):
+    observe("mystic_phase_seconds", seconds, bot=bot, phase=phase)
+    if _current is not None:
+        _current.spans[phase] = _current.spans.get(phase, 0.0) + seconds
+
+
+def count(field, amount=1):
+    if _current is not None:
+        _current.counts[field] = _current.counts.get(field, 0) + amount
+
+
+def record_usage(usage):
+    if _current is None or usage is None:
+        return
+    _current.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+    _current.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+
+def ensure_runs_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bot TEXT,
+            started_at TEXT,
+            finished_at TEXT,
+            duration_seconds REAL,
+            status TEXT,
+            error TEXT,
+            spans TEXT,
+            cards_found INTEGER,
+            cards_parsed INTEGER,
+            skipped INTEGER,
+            summarized INTEGER,
+            failed INTEGER,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            db_write_seconds REAL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_runs_bot_started ON runs(bot, started_at)")
+
+
+def save_trace(trace):
+    try:
+        conn = sqlite3.connect(metrics_db_path, timeout=30)
+        cursor = conn.cursor()
+        ensure_runs_schema(cursor)
+        cursor.execute("""
+            INSERT INTO runs (bot, started_at, finished_at, duration_seconds, status, error, spans,
+                              cards_found, cards_parsed, skipped, summarized, failed,
+                              prompt_tokens, completion_tokens, db_write_seconds)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            trace.bot, trace.started_at, datetime.utcnow().isoformat(), trace.duration,
+            trace.status, trace.error, json.dumps(trace.spans),
+            *[trace.counts[field] for field in COUNT_FIELDS],
+            trace.prompt_tokens, trace.completion_tokens, trace.spans.get("db")
+        ))
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ Run trace write error: {e}")
+
+
+@contextmanager
+def traced_run(bot):
+    global _current
+    trace = RunTrace(bot)
+    _current = trace
+    try:
+        yield trace
+    except Exception as e:
+        trace.status = "failed"
+        trace.error = repr(e)
+        incr("mystic_errors_total", bot=bot, kind="run")
+        raise
+    finally:
+        _current = None
+        trace.duration = time.perf_counter() - trace.started
+        incr("mystic_runs_total", bot=bot, status=trace.status)
+        save_trace(trace)
+        flush()
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def load_runs(bot=None, last=50):
+    conn = sqlite3.connect(metrics_db_path, timeout=30)
+    cursor = conn.cursor()
+    ensure_runs_schema(cursor)
+    query = "SELECT bot, started_at, duration_seconds, status, spans, prompt_tokens, completion_tokens FROM runs"
+    params = []
+    if bot:
+        query += " WHERE bot = ?"
+        params.append(bot)
+    query += " ORDER BY id DESC LIMIT ?"
+    params.append(last)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    conn.close()
+    return list(reversed(rows))
+
+
+def last_run(bot, since):
+    # Status and board size of the bot's latest run started at or after `since`
+    conn = sqlite3.connect(metrics_db_path, timeout=30)
+    cursor = conn.cursor()
+    ensure_runs_schema(cursor)
+    cursor.execute("""
+        SELECT status, cards_parsed FROM runs
+        WHERE bot = ? AND started_at >= ?
+        ORDER BY id DESC LIMIT 1
+    """, (bot, since))
+    row = cursor.fetchone()
+    conn.close()
+    return row
+
+
+def report(bot=None, last=50, threshold=1.25):
+    runs = load_runs(bot, last)
+    if not runs:
+        print("No runs recorded yet.")
+        return
+
+    by_bot = {}
+    for row in runs:
+        by_bot.setdefault(row[0], []).append(row)
+
+    for name, rows in sorted(by_bot.items()):
+        failed = sum(1 for r in rows if r[3] == "failed")
+        tokens = [(r[5] or 0) + (r[6] or 0) for r in rows]
+        print(f"\n📈 {name} — {len(rows)} run(s), {failed} failed, ~{sum(tokens) / len(rows):.0f} tokens/run")
+        print(f"   {'phase':<10} {'p50':>9} {'p95':>9} {'latest':>9}")
+
+        series = {phase: [] for phase in PHASES + ["total"]}
+        for r in rows:
+            spans = json.loads(r[4] or "{}")
+            for phase in PHASES:
+                if phase in spans:
+                    series[phase].append(spans[phase])
+            if r[2] is not None:
+                series["total"].append(r[2])
+
+        for phase, values in series.items():
+            if not values:
+                continue
+            baseline, latest = values[:-1] or values, values[-1]
+            p50, p95 = percentile(baseline, 50), percentile(baseline, 95)
+            flag = ""
+            if len(values) > 1 and latest > p95 and latest > p50 * threshold:
+                flag = "  ⚠️ regression"
+            print(f"   {phase:<10} {p50:>8.2f}s {p95:>8.2f}s {latest:>8.2f}s{flag}")
+
+
+def profile(bot, out=None, use_pyinstrument=False):
+    module = importlib.import_module(bot)
+    out = out or f"profile-{bot}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}"
+
+    if use_pyinstrument:
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            module.run_bot()
+        finally:
+            profiler.stop()
+            with open(f"{out}.html", "w") as f:
+                f.write(profiler.output_html())
+            print(profiler.output_text(unicode=True, color=False))
+            print(f"🧪 Profile written to {out}.html")
+        return
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(module.run_bot)
+    finally:
+        profiler.dump_stats(f"{out}.prof")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+        print(f"🧪 Profile written to {out}.prof")
+
+
+def add_arguments(parser):
+    sub = parser.add_subparsers(dest="trace_command", required=True)
+
+    report_parser = sub.add_parser("report", help="p50/p95 per phase over recent runs")
+    report_parser.add_argument("--bot")
+    report_parser.add_argument("--last", type=int, default=50)
+    report_parser.add_argument("--threshold", type=float, default=1.25,
+                               help="flag the latest run when a phase exceeds p95 and this multiple of p50")
+
+    profile_parser = sub.add_parser("profile", help="run one bot cycle under a profiler")
+    profile_parser.add_argument("bot", choices=["botv2", "ai_scraper", "mystic_trend_bot"])
+    profile_parser.add_argument("--out")
+    profile_parser.add_argument("--pyinstrument", action="store_true")
+
+
+def main(args):
+    if args.trace_command == "report":
+        report(args.bot, args.last, args.threshold)
+    elif args.trace_command == "profile":
+        profile(args.bot, args.out, args.pyinstrument)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mystic run traces")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from metrics import incr
+
+db_path = os.path.join(os.path.dirname(__file__), "trends.db")
+
+# Good pages are reused for SCRAPE_CACHE_TTL seconds. A failing URL or seed is
+# not retried for SCRAPE_BACKOFF seconds, doubling with each consecutive
+# failure up to SCRAPE_BACKOFF_MAX. After BREAKER_FAILURES failures in a row a
+# host's breaker opens and every request to it is skipped; once
+# BREAKER_COOLDOWN has passed one probe is let through, and only a success
+# closes it again. A failed probe doubles the cooldown.
+SCRAPE_CACHE_TTL = int(os.getenv("MYSTIC_SCRAPE_CACHE_TTL", "21600"))
+SCRAPE_BACKOFF = int(os.getenv("MYSTIC_SCRAPE_BACKOFF", "300"))
+SCRAPE_BACKOFF_MAX = int(os.getenv("MYSTIC_SCRAPE_BACKOFF_MAX", "21600"))
+BREAKER_FAILURES = int(os.getenv("MYSTIC_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN = int(os.getenv("MYSTIC_BREAKER_COOLDOWN", "600"))
+
+
+class ScrapeFailed(Exception):
+    pass
+
+
+def raise_for_status(response):
+    # Playwright returns None for same-document navigations
+    if response is not None and response.status >= 400:
+        raise ScrapeFailed(f"HTTP {response.status} for {response.url}")
+
+
+def ensure_scrape_cache_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_cache (
+            key TEXT PRIMARY KEY,
+            host TEXT,
+            payload TEXT,
+            fetched_at TEXT,
+            expires_at TEXT,
+            failures INTEGER DEFAULT 0,
+            retry_at TEXT,
+            error TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS host_breakers (
+            host TEXT PRIMARY KEY,
+            failures INTEGER,
+            opened_at TEXT,
+            retry_at TEXT
+        )
+    """)
+
+
+def backoff_seconds(failures, base, limit=SCRAPE_BACKOFF_MAX):
+    return min(limit, base * 2 ** max(0, failures - 1))
+
+
+def host_of(url):
+    return urlsplit(url).netloc or url
+
+
+class ScrapeGuard:
+    # Callers already holding a trends.db connection pass it in, so outcomes never wait on their own lock
+    def __init__(self, bot, conn=None):
+        self.bot = bot
+        self.owns_conn = conn is None
+        self.conn = conn or sqlite3.connect(db_path, timeout=30)
+        self.cursor = self.conn.cursor()
+        ensure_scrape_cache_schema(self.cursor)
+        self.conn.commit()
+        self.cursor.execute("SELECT host, failures, retry_at FROM host_breakers")
+        self.breakers = {host: [failures, retry_at] for host, failures, retry_at in self.cursor.fetchall()}
+        self.probing = set()
+
+    def entry(self, key):
+        self.cursor.execute("SELECT payload, expires_at, failures, retry_at FROM scrape_cache WHERE key = ?", (key,))
+        return self.cursor.fetchone()
+
+    def is_open(self, host, now=None):
+        failures, retry_at = self.breakers.get(host, (0, None))
+        now = now or datetime.utcnow().isoformat()
+        return failures >= BREAKER_FAILURES and bool(retry_at) and now < retry_at
+
+    def host_open(self, host, now=None):
+        if self.breakers.get(host, (0,))[0] < BREAKER_FAILURES:
+            return False
+        if self.is_open(host, now):
+            return True
+        # Half-open: one probe at a time, the rest wait for its outcome
+        if host in self.probing:
+            return True
+        self.probing.add(host)
+        print(f"🩺 {host}: circuit half-open, probing once.")
+        return False
+
+    def allow(self, key, url=None, row=None):
+        host = host_of(url or key)
+        now = datetime.utcnow().isoformat()
+        row = row or self.entry(key)
+        if row and row[3] and now < row[3]:
+            incr("mystic_scrape_cache_total", bot=self.bot, outcome="backoff")
+            return False
+        if self.host_open(host, now):
+            incr("mystic_scrape_cache_total", bot=self.bot, outcome="circuit_open")
+            return False
+        return True
+
+    def succeeded(self, key, url=None, payload=None, ttl=0):
+        host = host_of(url or key)
+        now = datetime.utcnow()
+        expires_at = (now + timedelta(seconds=ttl)).isoformat() if ttl and payload is not None else None
+        self.cursor.execute("""
+            INSERT INTO scrape_cache (key, host, payload, fetched_at, expires_at, failures, retry_at, error)
+            VALUES (?, ?, ?, ?, ?, 0, NULL, NULL)
+            ON CONFLICT(key) DO UPDATE SET
+                host=excluded.host,
+                payload=COALESCE(excluded.payload, scrape_cache.payload),
+                fetched_at=excluded.fetched_at,
+                expires_at=excluded.expires_at,
+                failures=0, retry_at=NULL, error=NULL
+        """, (key, host, None if payload is None else json.dumps(payload), now.isoformat(), expires_at))
+        if self.breakers.get(host, (0,))[0]:
+            if host in self.probing:
+                print(f"✅ {host}: probe succeeded, circuit closed.")
+            self.cursor.execute("DELETE FROM host_breakers WHERE host = ?", (host,))
+            self.breakers.pop(host, None)
+        self.probing.discard(host)
+        self.conn.commit()
+
+    def failed(self, key, url=None, error=None):
+        host = host_of(url or key)
+        now = datetime.utcnow()
+        row = self.entry(key)
+        failures = (row[2] or 0) + 1 if row else 1
+        retry_at = (now + timedelta(seconds=backoff_seconds(failures, SCRAPE_BACKOFF))).isoformat()
+        # The last good payload is kept so callers can fall back to it
+        self.cursor.execute("""
+            INSERT INTO scrape_cache (key, host, fetched_at, failures, retry_at, error)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                host=excluded.host,
+                failures=excluded.failures,
+                retry_at=excluded.retry_at,
+                error=excluded.error
+        """, (key, host, now.isoformat(), failures, retry_at, str(error)[:500] if error else None))
+
+        # Requests already in flight when the circuit opened don't count against the next probe
+        if self.is_open(host, now.isoformat()):
+            self.conn.commit()
+            return
+        host_failures = self.breakers.get(host, (0,))[0] + 1
+        host_retry_at = None
+        if host_failures >= BREAKER_FAILURES:
+            cooldown = backoff_seconds(host_failures - BREAKER_FAILURES + 1, BREAKER_COOLDOWN)
+            host_retry_at = (now + timedelta(seconds=cooldown)).isoformat()
+            print(f"🚧 {host}: circuit open after {host_failures} failure(s) in a row, skipping it for {cooldown}s.")
+            incr("mystic_circuit_trips_total", bot=self.bot, host=host)
+        self.cursor.execute("""
+            INSERT OR REPLACE INTO host_breakers (host, failures, opened_at, retry_at)
+            VALUES (?, ?, ?, ?)
+        """, (host, host_failures, now.isoformat() if host_retry_at else None, host_retry_at))
+        self.breakers[host] = [host_failures, host_retry_at]
+        self.probing.discard(host)
+        self.conn.commit()
+
+    def fetch(self, key, load, url=None, ttl=SCRAPE_CACHE_TTL, serve_stale=False, kind="scrape"):
+        # Returns load()'s payload, a cached one, or None when the request failed or was skipped
+        row = self.entry(key)
+        stale = json.loads(row[0]) if row and row[0] is not None else None
+        if row and row[1] and datetime.utcnow().isoformat() < row[1]:
+            incr("mystic_scrape_cache_total", bot=self.bot, outcome="hit")
+            return stale
+        if not self.allow(key, url, row):
+            return stale if serve_stale else None
+
+        incr("mystic_scrape_cache_total", bot=self.bot, outcome="miss")
+        try:
+            payload = load()
+        except Exception as e:
+            print(f"⚠️ {kind} failed for {key}: {e}")
+            incr("mystic_errors_total", bot=self.bot, kind=kind)
+            self.failed(key, url, e)
+            return stale if serve_stale else None
+        self.succeeded(key, url, payload, ttl)
+        return payload
+
+    def close(self):
+        if self.owns_conn:
+            self.conn.close()
+
+
+def add_arguments(parser):
+    parser.add_argument("--clear", action="store_true", help="forget cached pages, backoffs and open circuits")
+    parser.add_argument("--limit", type=int, default=20)
+
+
+def main(args):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    ensure_scrape_cache_schema(cursor)
+    if args.clear:
+        cursor.execute("DELETE FROM scrape_cache")
+        cursor.execute("DELETE FROM host_breakers")
+        conn.commit()
+        conn.close()
+        print("🧹 Scrape cache and circuit breakers cleared.")
+        return
+
+    now = datetime.utcnow().isoformat()
+    cursor.execute("SELECT host, failures, retry_at FROM host_breakers ORDER BY host")
+    for host, failures, retry_at in cursor.fetchall():
+        state = "closed" if failures < BREAKER_FAILURES else "open" if retry_at and now < retry_at else "half-open"
+        print(f"🔌 {host}: {state}, {failures} failure(s) in a row" + (f", retry after {retry_at}" if state == "open" else ""))
+    cursor.execute("SELECT COUNT(*) FROM scrape_cache WHERE expires_at > ?", (now,))
+    print(f"📦 {cursor.fetchone()[0]} cached page(s) still fresh.")
+    cursor.execute("""
+        SELECT key, failures, retry_at, error FROM scrape_cache
+        WHERE retry_at > ? ORDER BY retry_at DESC LIMIT ?
+    """, (now, args.limit))
+    for key, failures, retry_at, error in cursor.fetchall():
+        print(f"⏳ {key}: {failures} failure(s), retry after {retry_at} — {error}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the scrape cache and per-host circuit breakers")
+    add_arguments(parser)
+    main(parser.parse_args())
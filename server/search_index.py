@@ -0,0 +1,112 @@
+import html
+import re
+import sqlite3
+
+# External-content FTS5 table over trends; triggers keep it in sync with every
+# insert, upsert and delete the bots make, so the ingest path needs no changes.
+FTS_TABLE = "trends_fts"
+
+# FTS5 marks hits with private-use sentinels; the text is HTML-escaped before
+# they become <mark> tags, so scraped captions can't inject markup
+MARK_OPEN, MARK_CLOSE = "\ue000", "\ue001"
+
+
+def ensure_search_index(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,))
+    exists = cursor.fetchone() is not None
+
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            name, snippet, summary,
+            content='trends', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trends_fts_ai AFTER INSERT ON trends BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, snippet, summary)
+            VALUES (new.id, new.name, new.snippet, new.summary);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trends_fts_ad AFTER DELETE ON trends BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, snippet, summary)
+            VALUES ('delete', old.id, old.name, old.snippet, old.summary);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trends_fts_au AFTER UPDATE ON trends BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, snippet, summary)
+            VALUES ('delete', old.id, old.name, old.snippet, old.summary);
+            INSERT INTO {FTS_TABLE}(rowid, name, snippet, summary)
+            VALUES (new.id, new.name, new.snippet, new.summary);
+        END
+    """)
+
+    if not exists:
+        # Index whatever was already in trends before the triggers existed
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        print("🔎 Built full-text search index.")
+
+
+def build_match_query(q):
+    # Quote every term so user input can't inject FTS5 syntax; prefix-match the last one
+    terms = re.findall(r"\w+", q or "")
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def render_highlight(text):
+    if text is None:
+        return None
+    return html.escape(text).replace(MARK_OPEN, "<mark>").replace(MARK_CLOSE, "</mark>")
+
+
+def search_trends(cursor, q, limit=20, offset=0):
+    match = build_match_query(q)
+    if match is None:
+        return []
+
+    # bm25 column weights: a hit in the name counts more than one in the summary
+    cursor.execute(f"""
+        SELECT t.name, t.score, t.stage, t.url,
+               highlight({FTS_TABLE}, 0, ?, ?),
+               snippet({FTS_TABLE}, 1, ?, ?, '…', 12),
+               snippet({FTS_TABLE}, 2, ?, ?, '…', 16),
+               bm25({FTS_TABLE}, 10.0, 2.0, 1.0) AS rank
+        FROM {FTS_TABLE}
+        JOIN trends t ON t.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH ?
+        ORDER BY rank
+        LIMIT ? OFFSET ?
+    """, (*(MARK_OPEN, MARK_CLOSE) * 3, match, limit, offset))
+
+    return [
+        {
+            "name": row[0],
+            "score": row[1],
+            "stage": row[2],
+            "url": row[3],
+            "name_highlight": render_highlight(row[4]),
+            "snippet_highlight": render_highlight(row[5]),
+            "summary_highlight": render_highlight(row[6]),
+            "rank": row[7],
+        }
+        for row in cursor.fetchall()
+    ]
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "trends.db"))
+    cursor = conn.cursor()
+    ensure_search_index(cursor)
+    conn.commit()
+    for hit in search_trends(cursor, " ".join(sys.argv[1:])):
+        print(f"{hit['rank']:.2f}  {hit['name']}  {hit['summary_highlight']}")
+    conn.close()
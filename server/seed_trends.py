@@ -1,4 +1,8 @@
+import os
 import sqlite3
+from botv2 import ensure_db_schema
+
+db_path = os.path.join(os.path.dirname(__file__), "trends.db")
 
 sample_trends = [
     {
@@ -25,19 +29,11 @@ sample_trends = [
 ]
 
 def seed_database():
-    conn = sqlite3.connect("trends.db")
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
-    # Create the table if it doesn't exist
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS trends (
-            name TEXT,
-            score INTEGER,
-            stage TEXT,
-            summary TEXT,
-            url TEXT
-        )
-    """)
+    # Same schema the bots write, so the search triggers and name upserts keep working
+    ensure_db_schema(cursor)
 
     # Clear old data
     cursor.execute("DELETE FROM trends")
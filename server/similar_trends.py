@@ -0,0 +1,333 @@
+import argparse
+import math
+import os
+import re
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from summaries import PLACEHOLDER_SNIPPETS
+from trend_names import UNUSABLE_SUMMARIES, canonical_key
+
+db_path = os.path.join(os.path.dirname(__file__), "trends.db")
+INDEX_PATH = os.getenv("MYSTIC_SIMILAR_INDEX", os.path.join(os.path.dirname(__file__), "similar_index.npz"))
+SIMILAR_K = int(os.getenv("MYSTIC_SIMILAR_K", "20"))
+SIMILAR_BATCH = int(os.getenv("MYSTIC_SIMILAR_BATCH", "256"))
+MIN_SCORE = float(os.getenv("MYSTIC_SIMILAR_MIN_SCORE", "0.1"))
+
+# Trends become hashed TF-IDF vectors: character n-grams of the name (hashtags
+# glue words together, so "grungecore" and "grungeaesthetic" share grams) plus
+# words and word pairs from the captions and summary. The raw term frequencies
+# and document frequencies live in INDEX_PATH, so new trends are vectorized on
+# their own and only their rows are multiplied against the rest.
+FEATURES = 2 ** 20
+NAME_NGRAMS = (3, 4, 5)
+# Grams in more than this share of trends say nothing about a theme
+MAX_DF_RATIO = 0.2
+WORD_RE = re.compile(r"[^\W_]{3,}")
+STOPWORDS = {
+    "the", "and", "for", "with", "this", "that", "you", "your", "are", "was", "but", "not", "all", "just",
+    "its", "it's", "from", "have", "has", "what", "when", "who", "how", "get", "got", "into", "out", "about",
+    "more", "than", "they", "their", "them", "our", "can", "will", "like", "trend", "trending", "tiktok",
+}
+
+
+def load_numeric():
+    try:
+        import numpy
+        import scipy.sparse
+    except ImportError:
+        return None, None
+    return numpy, scipy.sparse
+
+
+def require_numeric():
+    np, sparse = load_numeric()
+    if np is None:
+        raise RuntimeError("The similar-trends index needs numpy and scipy (pip install numpy scipy)")
+    return np, sparse
+
+
+def ensure_similar_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS trend_similar (
+            name TEXT,
+            rank INTEGER,
+            neighbor TEXT,
+            score REAL,
+            PRIMARY KEY (name, rank)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trend_similar_neighbor ON trend_similar(neighbor)")
+
+
+def document_terms(name, snippet, summary):
+    padded = f" {canonical_key(name)} "
+    terms = [f"n:{padded[i:i + n]}" for n in NAME_NGRAMS for i in range(len(padded) - n + 1)]
+    text = " ".join(
+        t for t in (snippet, summary)
+        if t not in UNUSABLE_SUMMARIES and t.strip().lower() not in PLACEHOLDER_SNIPPETS
+    )
+    words = [w for w in WORD_RE.findall(text.casefold()) if w not in STOPWORDS]
+    terms += [f"w:{w}" for w in words]
+    terms += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    return terms
+
+
+def content_fingerprint(name, snippet, summary):
+    return zlib.crc32("\x1f".join(t or "" for t in (name, snippet, summary)).encode("utf-8"))
+
+
+def term_frequencies(np, sparse, rows):
+    # Sublinear tf per hashed column; crc32 keeps columns stable across processes and runs
+    columns = {}
+    indptr, indices, data = [0], [], []
+    for name, snippet, summary in rows:
+        for term, count in Counter(document_terms(name, snippet, summary)).items():
+            column = columns.get(term)
+            if column is None:
+                column = columns[term] = zlib.crc32(term.encode("utf-8")) & (FEATURES - 1)
+            indices.append(column)
+            data.append(1 + math.log(count))
+        indptr.append(len(indices))
+    tf = sparse.csr_matrix(
+        (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(len(rows), FEATURES)
+    )
+    # Two terms can hash to one column
+    tf.sum_duplicates()
+    return tf
+
+
+def document_frequencies(np, tf):
+    return np.bincount(tf.indices, minlength=FEATURES).astype(np.int64)
+
+
+def weigh(np, sparse, tf, df):
+    n_docs = tf.shape[0]
+    idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+    idf[df > max(2, MAX_DF_RATIO * n_docs)] = 0
+    vectors = sparse.csr_matrix(tf.multiply(idf.reshape(1, -1)))
+    norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    vectors = sparse.csr_matrix(sparse.diags(1 / norms) @ vectors)
+    vectors.eliminate_zeros()
+    return vectors
+
+
+def scored_batches(np, vectors, rows, batch_size=SIMILAR_BATCH):
+    # Cosine scores of each batch of rows against every trend, one matrix product per batch
+    transposed = vectors.T.tocsr()
+    for start in range(0, len(rows), batch_size):
+        batch = np.asarray(rows[start:start + batch_size])
+        scores = (vectors[batch] @ transposed).toarray()
+        scores[np.arange(len(batch)), batch] = 0
+        yield batch, scores
+
+
+def best_k(np, scores, k=SIMILAR_K):
+    kth = min(k, scores.shape[1]) - 1
+    top = np.argpartition(-scores, kth, axis=1)[:, :kth + 1]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+    return [
+        [(int(j), float(score)) for j, score in zip(row, row_scores) if score >= MIN_SCORE]
+        for row, row_scores in zip(top.tolist(), top_scores.tolist())
+    ]
+
+
+def neighbor_rows(name, neighbors):
+    return [(name, rank, neighbor, round(score, 4)) for rank, (neighbor, score) in enumerate(neighbors, 1)]
+
+
+def write_neighbors(cursor, name, neighbors):
+    cursor.execute("DELETE FROM trend_similar WHERE name = ?", (name,))
+    cursor.executemany("INSERT INTO trend_similar (name, rank, neighbor, score) VALUES (?, ?, ?, ?)",
+                       neighbor_rows(name, neighbors))
+
+
+def load_index(np, sparse, path=INDEX_PATH):
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as saved:
+        tf = sparse.csr_matrix((saved["data"], saved["indices"], saved["indptr"]), shape=tuple(saved["shape"]))
+        return {
+            "names": saved["names"].tolist(),
+            "fingerprints": saved["fingerprints"].tolist(),
+            "tf": tf,
+            "df": saved["df"],
+        }
+
+
+def save_index(np, index, path=INDEX_PATH):
+    partial = f"{path}.partial"
+    with open(partial, "wb") as f:
+        np.savez(
+            f, data=index["tf"].data, indices=index["tf"].indices, indptr=index["tf"].indptr,
+            shape=np.array(index["tf"].shape), df=index["df"],
+            names=np.array(index["names"], dtype=str), fingerprints=np.array(index["fingerprints"], dtype=np.uint32)
+        )
+    os.replace(partial, path)
+
+
+def load_trends(cursor):
+    cursor.execute("SELECT name, snippet, summary FROM trends WHERE name IS NOT NULL ORDER BY id")
+    return cursor.fetchall()
+
+
+def rebuild(np, sparse, conn, rows):
+    cursor = conn.cursor()
+    tf = term_frequencies(np, sparse, rows)
+    index = {
+        "names": [row[0] for row in rows],
+        "fingerprints": [content_fingerprint(*row) for row in rows],
+        "tf": tf,
+        "df": document_frequencies(np, tf),
+    }
+    vectors = weigh(np, sparse, tf, index["df"])
+    names = index["names"]
+
+    cursor.execute("DELETE FROM trend_similar")
+    for batch, scores in scored_batches(np, vectors, list(range(len(names)))):
+        cursor.executemany("INSERT INTO trend_similar (name, rank, neighbor, score) VALUES (?, ?, ?, ?)", [
+            entry
+            for row, neighbors in zip(batch.tolist(), best_k(np, scores))
+            for entry in neighbor_rows(names[row], [(names[j], score) for j, score in neighbors])
+        ])
+    conn.commit()
+    save_index(np, index)
+    return len(names)
+
+
+def update(np, sparse, conn, rows, index):
+    cursor = conn.cursor()
+    fingerprints = dict(zip(index["names"], index["fingerprints"]))
+    changed = [row for row in rows if fingerprints.get(row[0]) != content_fingerprint(*row)]
+    if not changed:
+        return 0
+
+    # Changed trends give their old terms back before their new row is appended
+    changed_names = {row[0] for row in changed}
+    keep = [i for i, name in enumerate(index["names"]) if name not in changed_names]
+    old = index["tf"][[i for i, name in enumerate(index["names"]) if name in changed_names]]
+    added = term_frequencies(np, sparse, changed)
+    tf = sparse.vstack([index["tf"][keep], added], format="csr")
+    df = index["df"] - document_frequencies(np, old) + document_frequencies(np, added)
+    names = [index["names"][i] for i in keep] + [row[0] for row in changed]
+    index = {
+        "names": names,
+        "fingerprints": [index["fingerprints"][i] for i in keep] + [content_fingerprint(*row) for row in changed],
+        "tf": tf,
+        "df": df,
+    }
+    vectors = weigh(np, sparse, tf, df)
+    position = {name: i for i, name in enumerate(names)}
+    updated_rows = list(range(len(keep), len(names)))
+
+    # Existing lists only change where an updated trend beats their current k-th neighbour,
+    # or where they already point at a trend whose content changed
+    cursor.execute("SELECT name, MIN(score), COUNT(*) FROM trend_similar GROUP BY name")
+    floors = {name: (score if count >= SIMILAR_K else MIN_SCORE) for name, score, count in cursor.fetchall()}
+    floor = np.array([floors.get(name, MIN_SCORE) for name in names], dtype=np.float32)
+    incoming = {}
+    for batch, scores in scored_batches(np, vectors, updated_rows):
+        for row, neighbors in zip(batch.tolist(), best_k(np, scores)):
+            write_neighbors(cursor, names[row], [(names[j], score) for j, score in neighbors])
+        for i, j in zip(*np.nonzero(scores > floor)):
+            incoming.setdefault(names[j], {})[names[batch[i]]] = float(scores[i, j])
+
+    for chunk in [list(changed_names)[i:i + 500] for i in range(0, len(changed_names), 500)]:
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(f"SELECT DISTINCT name FROM trend_similar WHERE neighbor IN ({placeholders})", chunk)
+        for (name,) in cursor.fetchall():
+            incoming.setdefault(name, {})
+
+    for name, candidates in incoming.items():
+        if name in changed_names or name not in position:
+            continue
+        cursor.execute("SELECT neighbor, score FROM trend_similar WHERE name = ? ORDER BY rank", (name,))
+        merged = {neighbor: score for neighbor, score in cursor.fetchall() if neighbor not in changed_names}
+        merged.update(candidates)
+        neighbors = sorted(merged.items(), key=lambda item: -item[1])[:SIMILAR_K]
+        write_neighbors(cursor, name, neighbors)
+    conn.commit()
+    save_index(np, index)
+    return len(changed)
+
+
+def build_similar_index(full=False):
+    np, sparse = require_numeric()
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    ensure_similar_schema(cursor)
+    rows = load_trends(cursor)
+    index = None if full else load_index(np, sparse)
+
+    current = {row[0] for row in rows}
+    if index is not None and not current.issuperset(index["names"]):
+        # Trends were merged or deleted; a partial update would leave dangling rows
+        print("♻️ Trends were removed since the last build; rebuilding the similar-trends index.")
+        index = None
+
+    if index is None:
+        print(f"🧭 Building the similar-trends index for {len(rows)} trend(s)...")
+        count = rebuild(np, sparse, conn, rows)
+    else:
+        count = update(np, sparse, conn, rows, index)
+    conn.close()
+
+    if count:
+        print(f"✅ Indexed {count} trend(s) in {time.perf_counter() - started:.1f}s")
+    else:
+        print("💤 Similar-trends index is up to date.")
+    return count
+
+
+def resolve_name(cursor, name):
+    # Exact name first, then anything the scrapers have recorded as an alias of it
+    cursor.execute("SELECT 1 FROM trends WHERE name = ? LIMIT 1", (name,))
+    if cursor.fetchone():
+        return name
+    cursor.execute("SELECT name FROM trend_aliases WHERE alias = ?", (name,))
+    row = cursor.fetchone()
+    if row is None:
+        cursor.execute("SELECT name FROM trend_aliases WHERE canonical_key = ? LIMIT 1", (canonical_key(name),))
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def fetch_similar(cursor, name, limit=10):
+    cursor.execute(
+        "SELECT neighbor, score FROM trend_similar WHERE name = ? ORDER BY rank LIMIT ?", (name, limit)
+    )
+    return [{"name": neighbor, "score": score} for neighbor, score in cursor.fetchall()]
+
+
+def add_arguments(parser):
+    parser.add_argument("--rebuild", action="store_true", help="re-vectorize every trend instead of only new or changed ones")
+    parser.add_argument("--show", metavar="NAME", help="print the stored neighbours of one trend")
+    parser.add_argument("--limit", type=int, default=10)
+
+
+def main(args):
+    if args.show:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        ensure_similar_schema(cursor)
+        name = resolve_name(cursor, args.show) or args.show
+        similar = fetch_similar(cursor, name, args.limit)
+        conn.close()
+        for neighbor in similar:
+            print(f"{neighbor['score']:.3f}  {neighbor['name']}")
+        if not similar:
+            print(f"💤 No similar trends stored for {args.show}.")
+        return
+    build_similar_index(full=args.rebuild)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the precomputed similar-trends index")
+    add_arguments(parser)
+    main(parser.parse_args())
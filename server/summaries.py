@@ -0,0 +1,117 @@
+import os
+from clients import get_openai_client
+from metrics import incr, timer
+from run_traces import record_usage
+
+# Every bot summarizes through here. The persona and instructions are one fixed
+# system message, so each request opens with an identical prefix the API can
+# cache; only the trend name and its trimmed captions vary, and they come last.
+SYSTEM_PROMPT = (
+    "You are a cultural trend analyst who thinks like a NYC creative director and talks like a laid-back LA it-girl. "
+    "You decode viral trends with ease, always clocking what’s legit vs. cringe. "
+    "You're a sharp, slightly elitist trend-savvy cultural critic with Gen Z wit and NYC edge.\n\n"
+    "For the TikTok trend you're given, write a short, smart summary in 2-3 sentences—make it human, sarcastic (but not cheesy), and insightful. "
+    "Skip suggestions. Don't be a cheerleader. You’re not trying to be cool—you just are. "
+    "Assume the reader knows TikTok but isn’t drinking the Kool-Aid. Avoid disclaimers about being an AI."
+)
+
+# Niche and Early trends go to the fast model; the large one is kept for trends that matter
+FAST_MODEL = os.getenv("MYSTIC_FAST_MODEL", "gpt-4o-mini")
+LARGE_MODEL = os.getenv("MYSTIC_LARGE_MODEL", "gpt-4o")
+LARGE_STAGES = {stage.strip() for stage in os.getenv("MYSTIC_LARGE_STAGES", "Rising,Exploding").split(",") if stage.strip()}
+SNIPPET_TOKEN_BUDGET = int(os.getenv("MYSTIC_SNIPPET_TOKENS", "160"))
+SUMMARY_MAX_TOKENS = int(os.getenv("MYSTIC_SUMMARY_MAX_TOKENS", "180"))
+
+# What the scrapers store when they couldn't get captions
+PLACEHOLDER_SNIPPETS = {"no preview", "no content preview available."}
+
+_encodings = {}
+
+
+def encoding_for(model):
+    # tiktoken is optional; without it a token is estimated as 4 characters
+    if model not in _encodings:
+        try:
+            import tiktoken
+
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encodings[model] = None
+    return _encodings[model]
+
+
+def count_tokens(text, model=FAST_MODEL):
+    encoding = encoding_for(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def truncate_tokens(text, budget, model=FAST_MODEL):
+    encoding = encoding_for(model)
+    if encoding is None:
+        return text[:budget * 4]
+    return encoding.decode(encoding.encode(text)[:budget])
+
+
+def condense_snippet(snippet, budget=SNIPPET_TOKEN_BUDGET, model=FAST_MODEL):
+    # Snippets are captions joined with " | ": keep distinct ones whole while they fit, then cut one to fill the budget
+    captions, seen = [], set()
+    for caption in (snippet or "").split("|"):
+        caption = " ".join(caption.split())
+        key = caption.lower()
+        if caption and key not in seen and key not in PLACEHOLDER_SNIPPETS:
+            seen.add(key)
+            captions.append(caption)
+
+    kept, used = [], 0
+    for caption in captions:
+        separator = 1 if kept else 0
+        cost = count_tokens(caption, model)
+        if used + separator + cost > budget:
+            remaining = budget - used - separator
+            if remaining >= 8:
+                kept.append(truncate_tokens(caption, remaining - 1, model).rstrip() + "…")
+            break
+        kept.append(caption)
+        used += separator + cost
+    return " | ".join(kept)
+
+
+def route_model(stage):
+    return LARGE_MODEL if stage in LARGE_STAGES else FAST_MODEL
+
+
+def build_messages(trend_name, snippet):
+    sample = snippet or "no captions available"
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"TikTok's #{trend_name} is trending. Here's a sample of the content: {sample}"},
+    ]
+
+
+def summarize_trend(bot, trend_name, snippet, stage=None):
+    model = route_model(stage)
+    messages = build_messages(trend_name, condense_snippet(snippet, model=model))
+    try:
+        with timer("mystic_llm_call_seconds", bot=bot, model=model):
+            response = get_openai_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=SUMMARY_MAX_TOKENS,
+            )
+        record_usage(response.usage)
+        incr("mystic_summaries_total", bot=bot, model=model)
+        return response.choices[0].message.content.strip(), []
+    except Exception as e:
+        print(f"⚠️ OpenAI API error: {e}")
+        incr("mystic_errors_total", bot=bot, kind="openai")
+        return "Summary unavailable.", []
+
+
+def describe_routing():
+    large = ", ".join(sorted(LARGE_STAGES)) or "no stages"
+    return f"{LARGE_MODEL} for {large}, {FAST_MODEL} otherwise"
@@ -0,0 +1,318 @@
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from change_detection import MAX_SQL_VARIABLES
+
+db_path = os.path.join(os.path.dirname(__file__), "trends.db")
+history_db_path = os.path.join(os.path.dirname(__file__), "trend_history.db")
+EXPORT_DIR = os.getenv("MYSTIC_EXPORT_DIR", os.path.join(os.path.dirname(__file__), "exports"))
+EXPORT_BATCH_SIZE = int(os.getenv("MYSTIC_EXPORT_BATCH_SIZE", "50000"))
+
+# Rows are paged by id so memory stays at one batch however big the table is.
+# The mark column is what incremental exports resume from: history rows are
+# append-only, trends rows are upserted in place and get a fresh timestamp.
+# Trends rows written before every bot stamped them have no timestamp and go
+# out with every incremental export.
+SOURCES = {
+    "history": {"path": history_db_path, "table": "trend_history", "mark": "id"},
+    "trends": {"path": db_path, "table": "trends", "mark": "timestamp"},
+}
+FORMATS = ["auto", "parquet", "arrow", "ndjson"]
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "ndjson": ".ndjson.gz"}
+ARROW_TYPES = {"INTEGER": "int64", "REAL": "float64"}
+
+
+def load_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def resolve_format(fmt):
+    if fmt == "auto":
+        return "parquet" if load_pyarrow() else "ndjson"
+    if fmt in ("parquet", "arrow") and not load_pyarrow():
+        raise RuntimeError(f"{fmt} export needs pyarrow (pip install pyarrow), or use --format ndjson")
+    return fmt
+
+
+def parse_mark(source, value):
+    if value is None or SOURCES[source]["mark"] != "id":
+        return value
+    return int(value)
+
+
+def read_batches(source, since=None, until=None, names=None, after=None, batch_size=EXPORT_BATCH_SIZE):
+    spec = SOURCES[source]
+    names = list(names or [])
+    if len(names) > MAX_SQL_VARIABLES:
+        raise ValueError(f"At most {MAX_SQL_VARIABLES} names per export")
+
+    conn = sqlite3.connect(f"file:{spec['path']}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({spec['table']})")
+    columns = [(row[1], (row[2] or "").upper()) for row in cursor.fetchall()]
+    if not columns:
+        conn.close()
+        raise ValueError(f"{spec['table']} does not exist in {spec['path']}")
+
+    clauses, params = [], []
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    if names:
+        clauses.append(f"name IN ({','.join('?' * len(names))})")
+        params.extend(names)
+    if after is not None:
+        if spec["mark"] == "id":
+            clauses.append("id > ?")
+        else:
+            clauses.append(f"({spec['mark']} > ? OR {spec['mark']} IS NULL)")
+        params.append(after)
+    where = "".join(f" AND {clause}" for clause in clauses)
+    select = ", ".join(name for name, _ in columns)
+    id_index = [name for name, _ in columns].index("id")
+
+    def batches():
+        last_id = 0
+        try:
+            while True:
+                cursor.execute(
+                    f"SELECT {select} FROM {spec['table']} WHERE id > ?{where} ORDER BY id LIMIT ?",
+                    [last_id, *params, batch_size]
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                yield rows
+                last_id = rows[-1][id_index]
+                if len(rows) < batch_size:
+                    break
+        finally:
+            conn.close()
+
+    return columns, batches()
+
+
+def arrow_schema(pa, columns):
+    return pa.schema([(name, getattr(pa, ARROW_TYPES.get(col_type, "string"))()) for name, col_type in columns])
+
+
+def arrow_batch(pa, schema, rows):
+    arrays = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if pa.types.is_string(field.type):
+            values = [None if v is None else str(v) for v in values]
+        else:
+            # SQLite columns are loosely typed; anything non-numeric becomes null
+            values = [v if isinstance(v, (int, float)) else None for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class NdjsonWriter:
+    def __init__(self, path, columns):
+        self.names = [name for name, _ in columns]
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(dict(zip(self.names, row)), ensure_ascii=False, default=str))
+            self.file.write("\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowWriter:
+    def __init__(self, path, columns, fmt):
+        self.pa = load_pyarrow()
+        self.schema = arrow_schema(self.pa, columns)
+        if fmt == "parquet":
+            import pyarrow.parquet
+
+            self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            import pyarrow.ipc
+
+            self.writer = pyarrow.ipc.new_file(path, self.schema, options=pyarrow.ipc.IpcWriteOptions(compression="zstd"))
+
+    def write(self, rows):
+        self.writer.write_batch(arrow_batch(self.pa, self.schema, rows))
+
+    def close(self):
+        self.writer.close()
+
+
+def ensure_marks_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS export_marks (
+            cursor TEXT,
+            source TEXT,
+            mark TEXT,
+            row_count INTEGER,
+            updated_at TEXT,
+            PRIMARY KEY (cursor, source)
+        )
+    """)
+
+
+def load_mark(cursor_name, source):
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    ensure_marks_schema(cursor)
+    cursor.execute("SELECT mark FROM export_marks WHERE cursor = ? AND source = ?", (cursor_name, source))
+    row = cursor.fetchone()
+    conn.close()
+    return json.loads(row[0]) if row else None
+
+
+def save_mark(cursor_name, source, mark, row_count):
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    ensure_marks_schema(cursor)
+    cursor.execute("""
+        INSERT OR REPLACE INTO export_marks (cursor, source, mark, row_count, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (cursor_name, source, json.dumps(mark), row_count, datetime.utcnow().isoformat()))
+    conn.commit()
+    conn.close()
+
+
+def export(source, out=None, fmt="auto", since=None, until=None, names=None, cursor_name=None,
+           batch_size=EXPORT_BATCH_SIZE):
+    fmt = resolve_format(fmt)
+    after = load_mark(cursor_name, source) if cursor_name else None
+    if out is None:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        out = os.path.join(EXPORT_DIR, f"{source}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}{EXTENSIONS[fmt]}")
+    if after is not None:
+        print(f"↪️ Resuming {source} export '{cursor_name}' after {SOURCES[source]['mark']} {after}")
+
+    columns, batches = read_batches(source, since, until, names, after, batch_size)
+    mark_index = [name for name, _ in columns].index(SOURCES[source]["mark"])
+    partial = f"{out}.partial"
+    writer = NdjsonWriter(partial, columns) if fmt == "ndjson" else ArrowWriter(partial, columns, fmt)
+
+    started = time.perf_counter()
+    row_count = 0
+    mark = after
+    try:
+        for rows in batches:
+            writer.write(rows)
+            row_count += len(rows)
+            marks = [row[mark_index] for row in rows if row[mark_index] is not None]
+            if marks:
+                mark = max(marks) if mark is None else max(mark, *marks)
+            print(f"📤 {row_count} row(s) exported...")
+    finally:
+        writer.close()
+
+    if not row_count:
+        os.remove(partial)
+        print(f"💤 No {source} rows to export.")
+        return None
+
+    # Only a finished file replaces the target, and only then does the mark move
+    os.replace(partial, out)
+    if cursor_name:
+        save_mark(cursor_name, source, mark, row_count)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Exported {row_count} {source} row(s) to {out} in {elapsed:.1f}s ({row_count / max(elapsed, 1e-9):,.0f} rows/s)")
+    return out
+
+
+def stream_ndjson(source, since=None, until=None, names=None, after=None, batch_size=EXPORT_BATCH_SIZE):
+    # read_batches runs now, so a missing DB or table raises before any response starts
+    columns, batches = read_batches(source, since, until, names, after, batch_size)
+    return ndjson_chunks([name for name, _ in columns], batches)
+
+
+def ndjson_chunks(column_names, batches):
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(column_names, row)), ensure_ascii=False, default=str) + "\n" for row in rows
+        ).encode("utf-8")
+
+
+class ChunkSink:
+    # File-like target for the Arrow IPC writer; drain() hands back what was written since last time
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_arrow(source, since=None, until=None, names=None, after=None, batch_size=EXPORT_BATCH_SIZE):
+    pa = load_pyarrow()
+    columns, batches = read_batches(source, since, until, names, after, batch_size)
+    return arrow_chunks(pa, arrow_schema(pa, columns), batches)
+
+
+def arrow_chunks(pa, schema, batches):
+    import pyarrow.ipc
+
+    sink = ChunkSink()
+    writer = pyarrow.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    for rows in batches:
+        writer.write_batch(arrow_batch(pa, schema, rows))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def add_arguments(parser):
+    parser.add_argument("source", choices=list(SOURCES))
+    parser.add_argument("--format", choices=FORMATS, default="auto",
+                        help="auto picks parquet when pyarrow is installed, gzip NDJSON otherwise")
+    parser.add_argument("--out", help=f"output file (default: a timestamped file in {EXPORT_DIR})")
+    parser.add_argument("--since", help="ISO timestamp, inclusive")
+    parser.add_argument("--until", help="ISO timestamp, exclusive")
+    parser.add_argument("--name", action="append", dest="names", help="only these trend names (repeatable)")
+    parser.add_argument("--incremental", metavar="CURSOR",
+                        help="resume from this cursor's high-water mark and advance it on success; "
+                             "trends rows with no timestamp are always included")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+
+
+def main(args):
+    try:
+        export(args.source, args.out, args.format, args.since, args.until, args.names, args.incremental, args.batch_size)
+    except (RuntimeError, ValueError, sqlite3.OperationalError) as e:
+        sys.exit(f"❌ Export failed: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export trends or trend history")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,365 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from botv2 import BOARD_KEY, determine_stage, ensure_db_schema, ensure_history_schema
+from metrics import incr
+from trend_movers import refresh_movers
+from trend_names import NameIndex
+
+db_path = os.path.join(os.path.dirname(__file__), "trends.db")
+history_db_path = os.path.join(os.path.dirname(__file__), "trend_history.db")
+IMPORT_BATCH_SIZE = int(os.getenv("MYSTIC_IMPORT_BATCH_SIZE", "50000"))
+
+# Backfills never touch the LLM: rows are normalized, staged in a temp table
+# keyed by (name, timestamp), then moved into trend_history with one set-based
+# INSERT ... SELECT. Missing summaries are left for `mystic summarize`.
+FORMATS = ["auto", "jsonl", "csv", "sqlite", "parquet"]
+HISTORY_COLUMNS = ["name", "timestamp", "score", "stage", "views", "likes", "comments",
+                   "leaderboard_rank", "region", "period", "industry"]
+BOARD_COLUMNS = ["region", "period", "industry"]
+TREND_COLUMNS = [column for column in HISTORY_COLUMNS if column not in BOARD_COLUMNS] + ["summary", "url", "snippet", "examples"]
+FIELDS = HISTORY_COLUMNS + ["summary", "url", "snippet", "examples"]
+SECONDARY_INDEXES = {
+    "idx_trend_history_name": "CREATE INDEX IF NOT EXISTS idx_trend_history_name ON trend_history(name)",
+    "idx_trend_history_region": "CREATE INDEX IF NOT EXISTS idx_trend_history_region ON trend_history(region, period)",
+    "idx_trend_history_timestamp": "CREATE INDEX IF NOT EXISTS idx_trend_history_timestamp ON trend_history(timestamp)",
+    "idx_trend_history_board": "CREATE INDEX IF NOT EXISTS idx_trend_history_board ON trend_history(region, period, industry, name, timestamp)",
+}
+
+# First key present wins; older DBs and CSV exports used different column names
+ALIASES = {
+    "name": ["name", "trend", "hashtag", "hashtag_name", "title"],
+    "timestamp": ["timestamp", "scraped_at", "created_at", "date"],
+    "summary": ["summary", "insight"],
+    "leaderboard_rank": ["leaderboard_rank", "rank"],
+    "views": ["views", "video_views", "view_count"],
+}
+
+_key_maps = {}
+
+
+def detect_format(path):
+    lowered = path.lower().removesuffix(".gz")
+    if lowered.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith(".parquet"):
+        return "parquet"
+    if lowered.endswith((".db", ".sqlite", ".sqlite3")):
+        return "sqlite"
+    raise ValueError(f"Can't tell the format of {path}; pass --format")
+
+
+def open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def read_jsonl(path, batch_size):
+    batch = []
+    with open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            batch.append(record if isinstance(record, dict) else {})
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def read_csv(path, batch_size):
+    batch = []
+    with open_text(path) as f:
+        for record in csv.DictReader(f):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def read_sqlite(path, batch_size, table=None):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    if table is None:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables = {row[0] for row in cursor.fetchall()}
+        table = next((t for t in ("trend_history", "trends") if t in tables), None)
+        if table is None:
+            conn.close()
+            raise ValueError(f"{path} has no trend_history or trends table; pass --table")
+    try:
+        cursor.execute(f"SELECT * FROM {table}")
+        columns = [d[0] for d in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [dict(zip(columns, row)) for row in rows]
+    finally:
+        conn.close()
+
+
+def read_parquet(path, batch_size):
+    import pyarrow.parquet
+
+    for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield batch.to_pylist()
+
+
+def read_records(path, fmt="auto", batch_size=IMPORT_BATCH_SIZE, table=None):
+    fmt = detect_format(path) if fmt == "auto" else fmt
+    if fmt == "jsonl":
+        return read_jsonl(path, batch_size)
+    if fmt == "csv":
+        return read_csv(path, batch_size)
+    if fmt == "parquet":
+        return read_parquet(path, batch_size)
+    return read_sqlite(path, batch_size, table)
+
+
+def source_keys(record):
+    # Records from one file share their keys, so alias lookup happens once per shape, not per row
+    shape = tuple(record)
+    keys = _key_maps.get(shape)
+    if keys is None:
+        keys = {field: [key for key in ALIASES.get(field, [field]) if key in record] for field in FIELDS}
+        _key_maps[shape] = keys
+    return keys
+
+
+def pick(record, keys, field):
+    for key in keys[field]:
+        value = record[key]
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def to_text(value):
+    return None if value in (None, "") else str(value)
+
+
+def to_timestamp(value, fallback):
+    if value in (None, ""):
+        return fallback
+    if isinstance(value, str) and len(value) in (19, 26) and value[10] == "T":
+        # Already naive ISO, the format every bot writes
+        try:
+            datetime.fromisoformat(value)
+            return value
+        except ValueError:
+            return None
+    if isinstance(value, (str, int)) and len(str(value)) == 8 and str(value).isdigit():
+        # Compact dates like 20250101 would otherwise pass for epoch seconds
+        try:
+            return datetime.strptime(str(value), "%Y%m%d").isoformat()
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)) or str(value).replace(".", "", 1).isdigit():
+        seconds = float(value)
+        # Millisecond epochs are common in TikTok payloads
+        if seconds > 1e11:
+            seconds /= 1000
+        # Anything outside 2001–2286 is not an epoch this data could carry
+        if not 1e9 <= seconds < 1e10:
+            return None
+        return datetime.utcfromtimestamp(seconds).isoformat()
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def normalize(record, names, fallback_timestamp):
+    keys = source_keys(record)
+    raw_name = pick(record, keys, "name")
+    timestamp = to_timestamp(pick(record, keys, "timestamp"), fallback_timestamp)
+    if not raw_name or not str(raw_name).strip("# ") or not timestamp:
+        return None
+
+    normalized = dict.fromkeys(FIELDS)
+    normalized.update({field: to_text(pick(record, keys, field)) for field in FIELDS if keys[field]})
+    normalized.update(
+        name=names.resolve(str(raw_name).strip()),
+        timestamp=timestamp,
+        score=to_int(pick(record, keys, "score")),
+        leaderboard_rank=to_int(pick(record, keys, "leaderboard_rank")),
+    )
+    if not normalized.get("stage") and normalized["score"] is not None:
+        normalized["stage"] = determine_stage(normalized["score"])
+    return normalized
+
+
+def upsert_latest(cursor, records):
+    # Newest record per name updates trends; an existing usable summary is never replaced
+    latest, boards = {}, {}
+    for record in records:
+        board = tuple(record[column] for column in BOARD_COLUMNS)
+        if any(board):
+            # A regional board's rank and views belong in trend_boards, not the shared row
+            current = boards.get((record["name"], board))
+            if current is None or record["timestamp"] > current["timestamp"]:
+                boards[(record["name"], board)] = record
+            record = dict(record, views=None, leaderboard_rank=None)
+        current = latest.get(record["name"])
+        if current is None or record["timestamp"] > current["timestamp"]:
+            latest[record["name"]] = record
+
+    cursor.executemany(f"""
+        INSERT INTO trend_boards (name, region, period, industry, views, leaderboard_rank, timestamp)
+        VALUES (:name, :region, :period, :industry, :views, :leaderboard_rank, :timestamp)
+        ON CONFLICT({BOARD_KEY}) DO UPDATE SET
+            views = COALESCE(excluded.views, trend_boards.views),
+            leaderboard_rank = COALESCE(excluded.leaderboard_rank, trend_boards.leaderboard_rank),
+            timestamp = excluded.timestamp
+        WHERE trend_boards.timestamp IS NULL OR excluded.timestamp > trend_boards.timestamp
+    """, list(boards.values()))
+
+    # Columns a source doesn't carry arrive as NULL and keep their current value. Rows
+    # without a timestamp are kept up to date by the bots, so a snapshot only fills their gaps.
+    placeholders = ", ".join(f":{column}" for column in TREND_COLUMNS)
+    updates = ", ".join(
+        f"{column} = CASE WHEN trends.timestamp IS NULL THEN COALESCE(trends.{column}, excluded.{column}) "
+        f"ELSE COALESCE(excluded.{column}, trends.{column}) END"
+        for column in TREND_COLUMNS if column not in ("name", "timestamp", "summary", "examples")
+    )
+    cursor.executemany(f"""
+        INSERT INTO trends ({", ".join(TREND_COLUMNS)}) VALUES ({placeholders})
+        ON CONFLICT(name) DO UPDATE SET
+            {updates},
+            timestamp = CASE WHEN trends.timestamp IS NULL THEN NULL ELSE excluded.timestamp END,
+            summary = CASE WHEN trends.summary IS NULL OR trends.summary IN ('', 'Summary unavailable.')
+                           THEN excluded.summary ELSE trends.summary END,
+            examples = COALESCE(trends.examples, excluded.examples)
+        WHERE trends.timestamp IS NULL OR excluded.timestamp > trends.timestamp
+    """, list(latest.values()))
+
+
+def import_files(paths, fmt="auto", batch_size=IMPORT_BATCH_SIZE, table=None, drop_indexes=False):
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    ensure_db_schema(cursor)
+    ensure_history_schema()
+    names = NameIndex(cursor)
+
+    history_conn = sqlite3.connect(history_db_path, timeout=30)
+    history_cursor = history_conn.cursor()
+    # Durability is per import: a crash means re-running it, and the dedupe makes that safe
+    history_cursor.execute("PRAGMA synchronous = OFF")
+    history_cursor.execute("PRAGMA cache_size = -65536")
+    history_cursor.execute("CREATE INDEX IF NOT EXISTS idx_trend_history_name_ts ON trend_history(name, timestamp)")
+    history_cursor.execute(f"""
+        CREATE TEMP TABLE import_staging (
+            {", ".join(f"{column} {'INTEGER' if column in ('score', 'leaderboard_rank') else 'TEXT'}" for column in HISTORY_COLUMNS)},
+            PRIMARY KEY (name, timestamp)
+        ) WITHOUT ROWID
+    """)
+
+    read = rejected = 0
+    for path in paths:
+        fallback = datetime.utcfromtimestamp(os.path.getmtime(path)).isoformat()
+        print(f"📥 Reading {path}...")
+        for batch in read_records(path, fmt, batch_size, table):
+            records = []
+            for raw in batch:
+                record = normalize(raw, names, fallback)
+                if record is None:
+                    rejected += 1
+                else:
+                    records.append(record)
+            read += len(batch)
+
+            history_cursor.executemany(
+                f"INSERT OR IGNORE INTO import_staging VALUES ({', '.join('?' * len(HISTORY_COLUMNS))})",
+                [tuple(record[column] for column in HISTORY_COLUMNS) for record in records]
+            )
+            upsert_latest(cursor, records)
+            conn.commit()
+            elapsed = time.perf_counter() - started
+            print(f"   {read:,} record(s) read — {read / max(elapsed, 1e-9):,.0f} records/s")
+
+    history_cursor.execute("SELECT COUNT(*) FROM import_staging")
+    staged = history_cursor.fetchone()[0]
+
+    if drop_indexes:
+        print("🗑️ Dropping secondary history indexes for the bulk insert...")
+        for index in SECONDARY_INDEXES:
+            history_cursor.execute(f"DROP INDEX IF EXISTS {index}")
+
+    insert_started = time.perf_counter()
+    history_cursor.execute(f"""
+        INSERT INTO trend_history ({", ".join(HISTORY_COLUMNS)})
+        SELECT {", ".join(f"s.{column}" for column in HISTORY_COLUMNS)} FROM import_staging s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM trend_history h WHERE h.name = s.name AND h.timestamp = s.timestamp
+        )
+        ORDER BY s.timestamp
+    """)
+    inserted = history_cursor.rowcount
+    history_conn.commit()
+
+    if drop_indexes:
+        print("🔨 Rebuilding history indexes...")
+        for sql in SECONDARY_INDEXES.values():
+            history_cursor.execute(sql)
+        history_conn.commit()
+
+    history_cursor.execute("DROP TABLE import_staging")
+    history_conn.close()
+    conn.close()
+
+    elapsed = time.perf_counter() - started
+    incr("mystic_import_rows_total", inserted)
+    print(f"✅ Imported {inserted:,} history row(s) from {read:,} record(s) in {elapsed:.1f}s "
+          f"({read / max(elapsed, 1e-9):,.0f} records/s; insert {time.perf_counter() - insert_started:.1f}s)")
+    print(f"   {rejected:,} rejected (no name or timestamp), "
+          f"{read - rejected - staged:,} duplicate(s) within the input, {staged - inserted:,} already in history")
+    if inserted:
+        refresh_movers()
+    return inserted
+
+
+def add_arguments(parser):
+    parser.add_argument("paths", nargs="+", help="JSONL, CSV (optionally .gz), Parquet or SQLite files")
+    parser.add_argument("--format", choices=FORMATS, default="auto", help="auto goes by file extension")
+    parser.add_argument("--table", help="SQLite source table (default: trend_history, then trends)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--drop-indexes", action="store_true",
+                        help="drop secondary history indexes during the insert and rebuild them after")
+
+
+def main(args):
+    import_files(args.paths, args.format, args.batch_size, args.table, args.drop_indexes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import historical trend snapshots")
+    add_arguments(parser)
+    main(parser.parse_args())
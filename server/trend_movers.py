@@ -0,0 +1,210 @@
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+db_path = os.path.join(os.path.dirname(__file__), "trends.db")
+history_db_path = os.path.join(os.path.dirname(__file__), "trend_history.db")
+
+# trend_movers holds one row per leaderboard entry per span, rebuilt from
+# trend_history after every ingest so the API answers with a single index range.
+# rank_change is previous_rank - rank: positive means the trend climbed.
+SPANS = ["run", "24h", "7d"]
+KINDS = {
+    "climbers": "rank_change > 0 ORDER BY rank_change DESC, rank",
+    "fallers": "rank_change < 0 ORDER BY rank_change, rank",
+    "new": "rank_change IS NULL AND new_entry = 1 ORDER BY rank",
+    "dropped": "rank_change IS NULL AND dropped_out = 1 ORDER BY previous_rank",
+}
+MOVER_COLUMNS = ["name", "region", "period", "industry", "rank", "previous_rank", "rank_change",
+                 "new_entry", "dropped_out", "updated_at"]
+
+# History only stores rows that moved, so each board entry's latest row is its
+# current state, and its last row before a cutoff is its state back then. A
+# drop-out is a row with a NULL rank (see record_dropouts). Rows without a
+# run_id predate it and are grouped into runs by minute. Entries that have not
+# moved in 7 days have nothing to report, so only the last week of history is
+# read, plus each entry's last row before that (its 7d baseline).
+BOARD_ROWS = "(run_id IS NOT NULL OR leaderboard_rank IS NOT NULL)"
+LATEST_SQL = f"""
+    CREATE TEMP TABLE movers_latest AS
+    WITH recent AS (
+        SELECT id, name, region, period, industry, timestamp, leaderboard_rank, run_id
+        FROM history.trend_history
+        WHERE timestamp > :week AND timestamp <= :now AND {BOARD_ROWS}
+    ),
+    anchors AS (
+        SELECT h.id, h.name, h.region, h.period, h.industry, h.timestamp, h.leaderboard_rank, h.run_id
+        FROM (SELECT DISTINCT region, period, industry, name FROM recent) k
+        JOIN history.trend_history h ON h.id = (
+            SELECT id FROM history.trend_history
+            WHERE region IS k.region AND period IS k.period AND industry IS k.industry AND name = k.name
+              AND timestamp <= :week AND {BOARD_ROWS}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT 1
+        )
+    ),
+    runs AS (
+        SELECT region, period, industry, MAX(COALESCE(run_id, substr(timestamp, 1, 16))) AS current_run
+        FROM recent
+        GROUP BY region, period, industry
+    ),
+    edges AS (
+        SELECT * FROM (
+            SELECT name, region, period, industry, timestamp, leaderboard_rank AS rank,
+                COALESCE(run_id, substr(timestamp, 1, 16)) AS run,
+                LAG(leaderboard_rank) OVER entry AS before_rank,
+                LEAD(timestamp) OVER entry AS next_timestamp
+            FROM (SELECT * FROM recent UNION ALL SELECT * FROM anchors)
+            WINDOW entry AS (PARTITION BY region, period, industry, name ORDER BY timestamp, id)
+        )
+        WHERE next_timestamp IS NULL
+           OR (timestamp <= :day AND next_timestamp > :day)
+           OR (timestamp <= :week AND next_timestamp > :week)
+    )
+    SELECT e.name, e.region, e.period, e.industry,
+        MAX(CASE WHEN next_timestamp IS NULL THEN rank END) AS rank,
+        MAX(CASE WHEN next_timestamp IS NULL THEN
+            CASE WHEN run = r.current_run THEN before_rank ELSE rank END
+        END) AS run_rank,
+        MAX(CASE WHEN timestamp <= :day AND (next_timestamp IS NULL OR next_timestamp > :day) THEN rank END) AS day_rank,
+        MAX(CASE WHEN timestamp <= :week AND (next_timestamp IS NULL OR next_timestamp > :week) THEN rank END) AS week_rank
+    FROM edges e
+    JOIN runs r ON r.region IS e.region AND r.period IS e.period AND r.industry IS e.industry
+    GROUP BY e.region, e.period, e.industry, e.name
+"""
+
+
+def new_run_id():
+    return datetime.utcnow().isoformat(timespec="seconds")
+
+
+def ensure_movers_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS trend_movers (
+            span TEXT,
+            name TEXT,
+            region TEXT,
+            period TEXT,
+            industry TEXT,
+            rank INTEGER,
+            previous_rank INTEGER,
+            rank_change INTEGER,
+            new_entry INTEGER,
+            dropped_out INTEGER,
+            updated_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_trend_movers_span
+        ON trend_movers(span, region, period, industry, rank_change)
+    """)
+
+
+def record_dropouts(history_cursor, names, dimensions, run_id, timestamp=None):
+    # Trends on this board last run but missing now get a NULL-rank history row
+    region, period, industry = dimensions
+    history_cursor.execute("""
+        SELECT name FROM (
+            SELECT name, leaderboard_rank,
+                ROW_NUMBER() OVER (PARTITION BY name ORDER BY timestamp DESC, id DESC) AS recency
+            FROM trend_history
+            WHERE region IS ? AND period IS ? AND industry IS ?
+              AND (run_id IS NOT NULL OR leaderboard_rank IS NOT NULL)
+        )
+        WHERE recency = 1 AND leaderboard_rank IS NOT NULL
+    """, (region, period, industry))
+    board = set(names)
+    dropped = [row[0] for row in history_cursor.fetchall() if row[0] not in board]
+    timestamp = timestamp or datetime.utcnow().isoformat()
+    history_cursor.executemany("""
+        INSERT INTO trend_history (name, timestamp, leaderboard_rank, region, period, industry, run_id)
+        VALUES (?, ?, NULL, ?, ?, ?, ?)
+    """, [(name, timestamp, region, period, industry, run_id) for name in dropped])
+    if dropped:
+        print(f"📉 {len(dropped)} trend(s) dropped off the leaderboard.")
+    return len(dropped)
+
+
+def refresh_movers(now=None):
+    started = time.perf_counter()
+    now = now or datetime.utcnow()
+    params = {
+        "now": now.isoformat(),
+        "day": (now - timedelta(hours=24)).isoformat(),
+        "week": (now - timedelta(days=7)).isoformat(),
+    }
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("ATTACH DATABASE ? AS history", (history_db_path,))
+        ensure_movers_schema(cursor)
+        cursor.execute("DROP TABLE IF EXISTS temp.movers_latest")
+        cursor.execute(LATEST_SQL, params)
+        # Readers keep seeing the previous snapshot until this commits
+        cursor.execute("DELETE FROM trend_movers")
+        for span, baseline in [("run", "run_rank"), ("24h", "day_rank"), ("7d", "week_rank")]:
+            cursor.execute(f"""
+                INSERT INTO trend_movers ({", ".join(["span"] + MOVER_COLUMNS)})
+                SELECT ?, name, region, period, industry, rank, {baseline}, {baseline} - rank,
+                       rank IS NOT NULL AND {baseline} IS NULL,
+                       rank IS NULL AND {baseline} IS NOT NULL, ?
+                FROM movers_latest
+                WHERE rank IS NOT NULL OR {baseline} IS NOT NULL
+            """, (span, params["now"]))
+        conn.commit()
+        cursor.execute("SELECT COUNT(*) FROM trend_movers")
+        rows = cursor.fetchone()[0]
+    except sqlite3.OperationalError as e:
+        conn.rollback()
+        print(f"⚠️ Could not refresh trend movers: {e}")
+        return None
+    finally:
+        conn.close()
+    print(f"📈 Refreshed {rows} mover row(s) in {time.perf_counter() - started:.2f}s")
+    return rows
+
+
+def fetch_movers(cursor, span="run", kind="climbers", dimensions=(None, None, None), limit=20):
+    region, period, industry = dimensions
+    cursor.execute(f"""
+        SELECT {", ".join(MOVER_COLUMNS)} FROM trend_movers
+        WHERE span = ? AND region IS ? AND period IS ? AND industry IS ? AND {KINDS[kind]}
+        LIMIT ?
+    """, (span, region, period, industry, limit))
+    return [
+        dict(zip(MOVER_COLUMNS, row), new_entry=bool(row[7]), dropped_out=bool(row[8]))
+        for row in cursor.fetchall()
+    ]
+
+
+def add_arguments(parser):
+    parser.add_argument("--refresh", action="store_true", help="rebuild trend_movers from history first")
+    parser.add_argument("--span", choices=SPANS, default="run")
+    parser.add_argument("--kind", choices=list(KINDS), default="climbers")
+    parser.add_argument("--region")
+    parser.add_argument("--period")
+    parser.add_argument("--industry")
+    parser.add_argument("--limit", type=int, default=20)
+
+
+def main(args):
+    if args.refresh:
+        refresh_movers()
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    ensure_movers_schema(cursor)
+    movers = fetch_movers(cursor, args.span, args.kind, (args.region, args.period, args.industry), args.limit)
+    conn.close()
+    for mover in movers:
+        change = "" if mover["rank_change"] is None else f" ({mover['rank_change']:+d})"
+        print(f"#{mover['rank'] or '-'} ← #{mover['previous_rank'] or '-'}{change}  {mover['name']}")
+    if not movers:
+        print("💤 No movers for that span yet.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leaderboard rank climbers, fallers, new entries and drop-outs")
+    add_arguments(parser)
+    main(parser.parse_args())
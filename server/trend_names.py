@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import unicodedata
+
+db_path = os.path.join(os.path.dirname(__file__), "trends.db")
+history_db_path = os.path.join(os.path.dirname(__file__), "trend_history.db")
+
+UNUSABLE_SUMMARIES = {None, "", "Summary unavailable."}
+
+
+def canonical_key(name):
+    # "#Siren Eyes", "sireneyes" and "SirenEyes ✨" all map to "sireneyes"
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    key = "".join(ch for ch in text.casefold() if ch.isalnum())
+    return key or (name or "").strip()
+
+
+def display_name(name):
+    return " ".join((name or "").replace("#", " ").split())
+
+
+def ensure_alias_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS trend_aliases (
+            alias TEXT PRIMARY KEY,
+            canonical_key TEXT NOT NULL,
+            name TEXT NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trend_aliases_key ON trend_aliases(canonical_key)")
+
+
+# In-memory alias -> canonical name lookup, loaded once per ingest
+class NameIndex:
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.by_alias = {}
+        self.by_key = {}
+
+        ensure_alias_schema(cursor)
+        cursor.execute("SELECT alias, canonical_key, name FROM trend_aliases")
+        for alias, key, name in cursor.fetchall():
+            self.by_alias[alias] = name
+            self.by_key.setdefault(key, name)
+
+        # Rows written before the alias table existed are their own canonical name
+        cursor.execute("SELECT name FROM trends")
+        for (name,) in cursor.fetchall():
+            if name:
+                self.by_key.setdefault(canonical_key(name), name)
+
+    def resolve(self, raw_name):
+        name = self.by_alias.get(raw_name)
+        if name is not None:
+            return name
+
+        key = canonical_key(raw_name)
+        name = self.by_key.get(key)
+        if name is None:
+            name = display_name(raw_name)
+            self.by_key[key] = name
+
+        self.by_alias[raw_name] = name
+        self.cursor.execute(
+            "INSERT OR IGNORE INTO trend_aliases (alias, canonical_key, name) VALUES (?, ?, ?)",
+            (raw_name, key, name)
+        )
+        return name
+
+
+def pick_canonical_row(rows):
+    # Keep the oldest row that already paid for a usable summary
+    return min(rows, key=lambda r: (r[2] in UNUSABLE_SUMMARIES, r[0]))
+
+
+def dedupe_existing_trends(conn, history_conn=None):
+    cursor = conn.cursor()
+    ensure_alias_schema(cursor)
+    # Installs that never ran a history-writing bot have no trend_history to re-point
+    history_cursor = history_conn.cursor() if history_conn is not None else None
+    if history_cursor is not None:
+        history_cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trend_history'")
+        if history_cursor.fetchone() is None:
+            history_cursor = None
+    if history_cursor is not None:
+        history_cursor.execute("CREATE INDEX IF NOT EXISTS idx_trend_history_name ON trend_history(name)")
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trend_boards'")
+    has_boards = cursor.fetchone() is not None
+
+    cursor.execute("SELECT id, name, summary FROM trends")
+    groups = {}
+    for row in cursor.fetchall():
+        if row[1]:
+            groups.setdefault(canonical_key(row[1]), []).append(row)
+
+    merged = 0
+    for key, rows in groups.items():
+        if len(rows) < 2:
+            continue
+        keeper = pick_canonical_row(rows)
+        variants = [r for r in rows if r[0] != keeper[0]]
+
+        cursor.executemany("DELETE FROM trends WHERE id = ?", [(r[0],) for r in variants])
+        cursor.executemany(
+            "INSERT OR REPLACE INTO trend_aliases (alias, canonical_key, name) VALUES (?, ?, ?)",
+            [(r[1], key, keeper[1]) for r in rows]
+        )
+        # Aliases ingests already recorded against a deleted variant would recreate it
+        cursor.execute("UPDATE trend_aliases SET name = ? WHERE canonical_key = ?", (keeper[1], key))
+        cursor.executemany(
+            "UPDATE trend_aliases SET name = ? WHERE name = ?",
+            [(keeper[1], r[1]) for r in variants]
+        )
+        if has_boards:
+            # A board both names were on keeps whichever row is newer
+            cursor.executemany("""
+                DELETE FROM trend_boards WHERE name = ? AND EXISTS (
+                    SELECT 1 FROM trend_boards k
+                    WHERE k.name = ? AND k.region IS trend_boards.region AND k.period IS trend_boards.period
+                      AND k.industry IS trend_boards.industry
+                      AND COALESCE(k.timestamp, '') >= COALESCE(trend_boards.timestamp, '')
+                )
+            """, [(r[1], keeper[1]) for r in variants])
+            cursor.executemany(
+                "UPDATE OR REPLACE trend_boards SET name = ? WHERE name = ?",
+                [(keeper[1], r[1]) for r in variants]
+            )
+        if history_cursor is not None:
+            history_cursor.executemany(
+                "UPDATE trend_history SET name = ? WHERE name = ?",
+                [(keeper[1], r[1]) for r in variants]
+            )
+        merged += len(variants)
+        print(f"🔗 Merged {len(variants)} variant(s) into: {keeper[1]}")
+
+    conn.commit()
+    if history_cursor is not None:
+        history_conn.commit()
+    return merged
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(db_path)
+    history_conn = sqlite3.connect(history_db_path) if os.path.exists(history_db_path) else None
+    merged = dedupe_existing_trends(conn, history_conn)
+    if history_conn is not None:
+        history_conn.close()
+    conn.close()
+    print(f"✅ Deduplicated {merged} trend row(s).")
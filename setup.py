@@ -1,5 +1,6 @@
 import sqlite3
 import subprocess
+import sys
 import threading
 import time
 
@@ -77,13 +78,13 @@ def seed_trends():
 
 def run_api_server():
     print("🚀 Starting FastAPI backend...")
-    subprocess.run(["uvicorn", "server.api_server:app", "--reload"])
+    subprocess.run([sys.executable, "server/mystic.py", "serve", "--reload"])
 
 
 # Optional: run bot after short delay (uncomment if desired)
 def run_bot():
     print("🤖 Running trend bot...")
-    subprocess.run(["python3", "server/mystic_trend_bot.py"])
+    subprocess.run([sys.executable, "server/mystic.py", "scrape", "discover", "--schedule"])
 
 
 if __name__ == "__main__":